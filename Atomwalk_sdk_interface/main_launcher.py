@@ -5,10 +5,12 @@ from Atomwalk_sdk_interface.dashboard.advia_dashboard import ADVIA_Dashboard
 from Atomwalk_sdk_interface.dashboard.iot_dashboard import IOT_Dashboard
 from Atomwalk_sdk_interface.dashboard.custom_dashboard import Custom_Dashboard
 from Atomwalk_sdk_interface.dashboard.test_dashboard import Test_Dashboard
-from SDK1.scripts.main import start_sdk
+from SDK1.scripts.main import start_sdk, start_watch_daemon
+from SDK1.advia_sdk.config import WATCH_MODE, METRICS_HOST, METRICS_PORT
 from IOT_SDK.main import start_sdk as start_iot_sdk
 from advia_proxy.proxy_listener import activate_proxy
 from Atomwalk_sdk_interface.utils.config_sync import sync_proxy_config_with_settings
+from Atomwalk_sdk_interface.utils.metrics import start_metrics_server
 import sys
 import traceback
 
@@ -18,6 +20,8 @@ class SDKInterfaceApp:
         self.login_window = None
         self.sdk_selection_window = None
         self.main_dashboard = None
+        self.watch_stop = None
+        self.metrics_server = None
 
     def run(self):
         print("🚀 Application started")
@@ -50,8 +54,21 @@ class SDKInterfaceApp:
                 print("🔄 Syncing ADVIA proxy configuration...")
                 sync_proxy_config_with_settings()
                 
-                # Start ADVIA SDK (your current main.py)
-                sdk_status = start_sdk()
+                if METRICS_PORT and self.metrics_server is None:
+                    self.metrics_server = start_metrics_server(METRICS_PORT, METRICS_HOST)
+
+                if self.watch_stop is not None:
+                    # Re-login while watch mode runs: the daemon keeps
+                    # delivering, a second pipeline would only race it
+                    print("👀 Watch mode is already delivering ADVIA files.")
+                    sdk_status = True
+                else:
+                    # Start ADVIA SDK (your current main.py)
+                    sdk_status = start_sdk()
+
+                    # Keep delivering files that arrive after the startup run
+                    if WATCH_MODE:
+                        self.watch_stop = start_watch_daemon()
             elif selected_sdk == "IOT_SDK":
                 # Start IOT SDK (from IOT_SDK folder)
                 print("🌐 Starting IOT SDK for sensor data collection...")
@@ -8,6 +8,8 @@ from PyQt5.QtCore import QSettings, Qt, pyqtSignal
 import requests
 import json
 
+from Atomwalk_sdk_interface.utils.endpoints import erp_url
+
 class DeviceTab(QWidget):
     devices_updated = pyqtSignal(list)
 
@@ -116,7 +118,7 @@ class DeviceTab(QWidget):
             QMessageBox.critical(self, "Error", "User DB not found. Please log in again.")
             return
             
-        url = f"https://crm.atomwalk.com/hr_api/get_device_token/{db_name}/"
+        url = erp_url(f"hr_api/get_device_token/{db_name}/")
         try:
             response = requests.post(url, json={"device_id": device_id, "secret_key": secret})
             if response.status_code == 200:
@@ -8,8 +8,11 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt, QTimer, QSettings
 
+from Atomwalk_sdk_interface.utils.endpoints import erp_url
+from Atomwalk_sdk_interface.utils.token_provider import token_provider
 
-CLOUD_LOGIN_API = "https://crm.atomwalk.com/rest-auth/login/"
+
+CLOUD_LOGIN_API = erp_url("rest-auth/login/")
 FORCED_LOGIN_INTERVAL = 60 * 60 * 1000  # 1 hour
 
 
@@ -40,7 +43,7 @@ def send_login_info(username, token, is_active=True):
     }
 
     db_name = username.split('@')[-1]
-    CLOUD_TRACKING_API = f"https://crm.atomwalk.com/api/external_login_info/{db_name}/"
+    CLOUD_TRACKING_API = erp_url(f"api/external_login_info/{db_name}/")
 
     try:
         response = requests.post(CLOUD_TRACKING_API, json=data, headers=headers)
@@ -140,10 +143,12 @@ class LoginWindow(QMainWindow):
             if token == 1:
                 self.label.setText("No Internet. Continue without login.")
                 self.settings.setValue("auth_token", token)
+                token_provider.set(str(token))
             else:
                 send_login_info(username, token)
                 self.settings.setValue("auth_token", token)
                 self.settings.setValue("user_name", username)
+                token_provider.set(token, username)
                 self.on_login_success()
                 self.close()
         else:
@@ -156,6 +161,7 @@ class LoginWindow(QMainWindow):
             if send_login_info(user, token, is_active=False):
                 self.settings.remove("auth_token")
                 self.settings.remove("user_name")
+                token_provider.clear()
                 self.username_input.clear()
                 self.password_input.clear()
                 self.label.setText("Enter Username & Password:")
@@ -2,10 +2,16 @@ from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem,
     QPushButton, QHBoxLayout, QLineEdit, QHeaderView, QMenu, QMessageBox
 )
-from PyQt5.QtCore import Qt, QTimer, QFileInfo
+from PyQt5.QtCore import Qt, QTimer
 import os
+from datetime import datetime
 from pathlib import Path
 
+from Atomwalk_sdk_interface.utils.spool import newest_files
+
+# Newest files shown in the table; the folder itself may hold far more
+DISPLAY_LIMIT = 1000
+
 class ProcessedFilesTab(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -139,44 +145,50 @@ class ProcessedFilesTab(QWidget):
             return
         
         try:
-            files = [f for f in self.processed_dir.iterdir() if f.is_file()]
+            # One scandir pass; only the newest DISPLAY_LIMIT files are kept
+            files, total = newest_files(self.processed_dir, DISPLAY_LIMIT)
             
             if not files:
                 self.add_info_row("No processed files found", "Info", "Directory is empty")
                 return
             
-            for file_path in sorted(files, key=lambda x: x.stat().st_mtime, reverse=True):
-                self.add_file_row(file_path)
+            self.table.setUpdatesEnabled(False)
+            try:
+                for spool_file in files:
+                    self.add_file_row(spool_file)
+                if total > len(files):
+                    self.add_info_row(f"Showing newest {len(files)} of {total} files", "Info", "")
+            finally:
+                self.table.setUpdatesEnabled(True)
+            self.apply_filter()
                 
         except Exception as e:
             self.add_info_row(f"Error reading directory: {str(e)}", "Error", "Access denied")
 
-    def add_file_row(self, file_path):
-        """Add a file to the table"""
+    def add_file_row(self, spool_file):
+        """Add a file to the table, using the stat taken by the directory scan"""
         try:
-            file_info = QFileInfo(str(file_path))
-            
             row_position = self.table.rowCount()
             self.table.insertRow(row_position)
             
             # Filename
-            self.table.setItem(row_position, 0, QTableWidgetItem(file_path.name))
+            self.table.setItem(row_position, 0, QTableWidgetItem(spool_file.name))
             
             # Size in KB
-            size_kb = file_info.size() / 1024
+            size_kb = spool_file.size / 1024
             size_text = f"{size_kb:.1f}" if size_kb > 0 else "0"
             self.table.setItem(row_position, 1, QTableWidgetItem(size_text))
             
             # Date Modified
-            modified_date = file_info.lastModified().toString("yyyy-MM-dd hh:mm:ss")
+            modified_date = datetime.fromtimestamp(spool_file.mtime).strftime("%Y-%m-%d %H:%M:%S")
             self.table.setItem(row_position, 2, QTableWidgetItem(modified_date))
             
             # Date Created
-            created_date = file_info.birthTime().toString("yyyy-MM-dd hh:mm:ss")
+            created_date = datetime.fromtimestamp(spool_file.ctime).strftime("%Y-%m-%d %H:%M:%S")
             self.table.setItem(row_position, 3, QTableWidgetItem(created_date))
             
             # Status (based on file extension)
-            status = "Processed" if file_path.suffix.lower() == '.astm' else "Other"
+            status = "Processed" if os.path.splitext(spool_file.name)[1].lower() == '.astm' else "Other"
             self.table.setItem(row_position, 4, QTableWidgetItem(status))
             
         except Exception as e:
@@ -0,0 +1,13 @@
+import os
+
+# Base URL of the Atomwalk ERP. Set ATOMWALK_ERP_URL to point every SDK at
+# another server, e.g. the local mock (python -m mock_erp).
+DEFAULT_ERP_BASE_URL = "https://crm.atomwalk.com"
+ERP_BASE_URL = os.environ.get("ATOMWALK_ERP_URL", DEFAULT_ERP_BASE_URL).rstrip("/")
+
+
+def erp_url(path):
+    """
+    Full URL of an ERP endpoint, e.g. erp_url("rest-auth/login/").
+    """
+    return f"{ERP_BASE_URL}/{path.lstrip('/')}"
@@ -1,37 +1,163 @@
+import atexit
+import os
+import queue
 import sqlite3
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 
-DB_PATH = Path(__file__).resolve().parent.parent / "sdk_logs.db"
+from Atomwalk_sdk_interface.utils.metrics import counter, gauge, histogram
+
+# ATOMWALK_LOG_DB points elsewhere, e.g. to keep a replay out of the live log
+DB_PATH = Path(os.environ.get("ATOMWALK_LOG_DB") or Path(__file__).resolve().parent.parent / "sdk_logs.db")
+# Group commit: rows are written once this many are queued or after this long
+LOG_BATCH_ROWS = 200
+LOG_BATCH_INTERVAL = 0.2  # seconds
+
+log_rows_written = counter("sdk_log_rows_written_total", "Log rows committed to sdk_logs.db")
+log_commit_seconds = histogram("sdk_log_commit_seconds", "Time to insert and commit one group of log rows")
+log_batch_rows = histogram("sdk_log_batch_rows", "Log rows per commit", buckets=(1, 5, 20, 50, 100, 200, 500))
+log_errors = counter("sdk_log_errors_total", "Log row groups that could not be written")
+log_queue_depth = gauge("sdk_log_queue_depth", "Log rows queued but not yet committed")
+
+CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS test_results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT,
+        device_id TEXT,
+        status TEXT,
+        test_name TEXT,
+        remarks TEXT
+    )
+"""
 
 def init_db():
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS test_results (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT,
-            device_id TEXT,
-            status TEXT,
-            test_name TEXT,
-            remarks TEXT
-        )
-    """)
+    cursor.execute(CREATE_TABLE_SQL)
     conn.commit()
     conn.close()
 
+
+class LogWriter:
+    """
+    Background writer for test_results rows.
+
+    Callers only queue a row; one thread owns a long-lived connection and
+    commits rows in groups of up to `batch_rows`, at most `interval`
+    seconds after the first of them was queued. flush() blocks until
+    everything queued so far is committed; it runs before every read.
+    close() commits what is left and closes the connection, which lets
+    SQLite remove the -wal/-shm files; it runs at interpreter exit.
+    """
+
+    def __init__(self, db_path=DB_PATH, batch_rows=LOG_BATCH_ROWS, interval=LOG_BATCH_INTERVAL):
+        self.db_path = db_path
+        self.batch_rows = batch_rows
+        self.interval = interval
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._thread = None
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="sdk-log-writer", daemon=True)
+            self._thread.start()
+
+    def write(self, row):
+        with self._lock:
+            self._pending += 1
+            self._ensure_thread()
+        self._queue.put(row)
+
+    def flush(self, timeout=5.0):
+        with self._lock:
+            if self._pending == 0:
+                return True
+            self._ensure_thread()
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        with self._lock:
+            thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(None)
+        thread.join(timeout)
+
+    def _run(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(CREATE_TABLE_SQL)
+        conn.commit()
+        try:
+            while True:
+                rows, waiters = [], []
+                item = self._queue.get()
+                deadline = time.monotonic() + self.interval
+                stopping = False
+                while True:
+                    if item is None:
+                        stopping = True
+                        break  # close(): commit what we have and stop
+                    if isinstance(item, threading.Event):
+                        waiters.append(item)
+                        break  # Someone is waiting: commit now
+                    rows.append(item)
+                    if len(rows) >= self.batch_rows:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+
+                if rows:
+                    started = time.perf_counter()
+                    try:
+                        conn.executemany("""
+                            INSERT INTO test_results (timestamp, device_id, status, test_name, remarks)
+                            VALUES (?, ?, ?, ?, ?)
+                        """, rows)
+                        conn.commit()
+                        log_rows_written.inc(len(rows))
+                    except sqlite3.Error as e:
+                        log_errors.inc()
+                        print(f"⚠️ Could not write {len(rows)} log rows: {e}")
+                    log_commit_seconds.observe(time.perf_counter() - started)
+                    log_batch_rows.observe(len(rows))
+                    with self._lock:
+                        self._pending -= len(rows)
+                for waiter in waiters:
+                    waiter.set()
+                if stopping:
+                    break
+        finally:
+            conn.close()
+
+
+_writer = LogWriter()
+atexit.register(_writer.close)
+log_queue_depth.set_function(lambda: _writer._pending)
+
 def log_test_result(device_id, status, test_name, remarks=""):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    cursor.execute("""
-        INSERT INTO test_results (timestamp, device_id, status, test_name, remarks)
-        VALUES (?, ?, ?, ?, ?)
-    """, (now, device_id, status, test_name, remarks))
-    conn.commit()
-    conn.close()
+    _writer.write((now, device_id, status, test_name, remarks))
+
+def flush_logs(timeout=5.0):
+    """
+    Wait until every queued log row is committed.
+    """
+    return _writer.flush(timeout)
 
 def fetch_logs_for_device(device_id):
+    flush_logs()
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     cursor.execute("""
@@ -42,6 +168,7 @@ def fetch_logs_for_device(device_id):
     return rows
 
 def fetch_logs_for_device_on_date(device_id, date_str):
+    flush_logs()
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     cursor.execute("""
@@ -54,6 +181,7 @@ def fetch_logs_for_device_on_date(device_id, date_str):
     return rows
 
 def fetch_all_logs_on_date(date_str):
+    flush_logs()
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     cursor.execute("""
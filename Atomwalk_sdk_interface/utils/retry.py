@@ -0,0 +1,167 @@
+import random
+import threading
+import time
+
+# Defaults; the SDK configs override these per endpoint
+MAX_ATTEMPTS = 4
+BASE_DELAY = 0.5       # seconds before the first retry (upper bound of the jitter)
+MAX_DELAY = 10.0       # cap on a single backoff sleep
+DEADLINE = 60.0        # total time budget for one request, including retries
+FAILURE_THRESHOLD = 5  # consecutive failures that open the circuit
+RESET_TIMEOUT = 30.0   # seconds the circuit stays open before a probe
+
+# HTTP statuses worth retrying; 500 is also what the senders return on
+# connection errors and timeouts
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because its circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Stops calls to an endpoint that keeps failing.
+
+    CLOSED: calls go through. After `failure_threshold` consecutive
+    failures the circuit OPENs and calls are rejected without touching
+    the network. After `reset_timeout` seconds one probe call is let
+    through (HALF_OPEN); success closes the circuit, failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                print(f"✅ Circuit '{self.name}' closed, endpoint recovered.")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    print(f"⛔ Circuit '{self.name}' opened after {self.failures} failures; "
+                          f"next probe in {self.reset_timeout:.0f}s.")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter, bounded by a per-request deadline.
+    """
+
+    def __init__(self, max_attempts=MAX_ATTEMPTS, base_delay=BASE_DELAY, max_delay=MAX_DELAY, deadline=DEADLINE):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    def backoff(self, attempt):
+        """
+        Sleep time before retry number `attempt` (1-based).
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+def cap_timeout(timeout, remaining):
+    """
+    Shrink a requests-style timeout (seconds or a (connect, read) pair) so
+    it does not run past `remaining` seconds.
+    """
+    remaining = max(remaining, 0.001)
+    if isinstance(timeout, tuple):
+        return tuple(remaining if t is None else min(t, remaining) for t in timeout)
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+def call_with_retry(call, policy, breaker=None, is_failure=None, is_retryable=None, on_open=None,
+                    is_retryable_error=None, timeout=None):
+    """
+    Run `call()` under `policy`, consulting `breaker` before every attempt.
+
+    When `timeout` is given, each attempt is run as `call(timeout)` with
+    the timeout capped at what is left of `policy.deadline`, so a slow
+    last attempt cannot overrun the deadline.
+
+    `is_failure(result)` decides whether a result counts against the
+    breaker, `is_retryable(result)` whether it is worth another attempt.
+    When the breaker rejects the call, `on_open()` provides the result.
+    Exceptions raised by `call` count as failures; they are retried if
+    `is_retryable_error(error)` says so (by default always), and the last
+    one is re-raised.
+    """
+    is_failure = is_failure or (lambda result: False)
+    is_retryable = is_retryable or is_failure
+    is_retryable_error = is_retryable_error or (lambda error: True)
+    started = time.monotonic()
+    attempt = 0
+
+    while True:
+        attempt += 1
+        if breaker is not None and not breaker.allow():
+            if on_open is not None:
+                return on_open()
+            raise CircuitOpenError(breaker.name)
+
+        error = None
+        try:
+            if timeout is None:
+                result = call()
+            else:
+                remaining = policy.deadline - (time.monotonic() - started)
+                result = call(cap_timeout(timeout, remaining))
+        except Exception as e:
+            error = e
+            result = None
+
+        failed = error is not None or is_failure(result)
+        if breaker is not None:
+            if failed:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+        if error is None and not (failed and is_retryable(result)):
+            return result
+        if error is not None and not is_retryable_error(error):
+            raise error
+
+        delay = policy.backoff(attempt)
+        out_of_time = time.monotonic() - started + delay > policy.deadline
+        if attempt >= policy.max_attempts or out_of_time:
+            if error is not None:
+                raise error
+            return result
+        time.sleep(delay)
@@ -0,0 +1,100 @@
+import heapq
+import os
+
+SPOOL_SUFFIX = ".astm"
+CHUNK_SIZE = 5000        # files handed out per chunk
+PROGRESS_EVERY = 10000   # entries scanned between progress callbacks
+
+
+class SpoolFile:
+    """
+    One file found by a directory scan, with the stat taken during the scan.
+    """
+
+    __slots__ = ('name', 'path', 'size', 'mtime', 'ctime')
+
+    def __init__(self, name, path, size, mtime, ctime):
+        self.name = name
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.ctime = ctime  # creation time on Windows, metadata change time elsewhere
+
+    @classmethod
+    def from_entry(cls, entry):
+        # DirEntry caches stat(); on Windows it comes free with the listing
+        st = entry.stat()
+        return cls(entry.name, entry.path, st.st_size, st.st_mtime, getattr(st, "st_birthtime", st.st_ctime))
+
+    def __repr__(self):
+        return f"SpoolFile({self.name!r}, size={self.size})"
+
+
+def iter_spool(directory, suffix=SPOOL_SUFFIX, progress=None, progress_every=PROGRESS_EVERY, skip=None):
+    """
+    Yield a SpoolFile for every regular file in `directory` ending with
+    `suffix` (None = any file), without building the whole listing.
+    Names for which `skip(name)` is true are passed over without a stat.
+
+    `progress(scanned)` is called every `progress_every` directory entries
+    and once at the end. A missing directory yields nothing.
+    """
+    scanned = 0
+    try:
+        iterator = os.scandir(directory)
+    except FileNotFoundError:
+        return
+    with iterator:
+        for entry in iterator:
+            scanned += 1
+            if progress is not None and scanned % progress_every == 0:
+                progress(scanned)
+            if suffix is not None and not entry.name.endswith(suffix):
+                continue
+            if skip is not None and skip(entry.name):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                yield SpoolFile.from_entry(entry)
+            except OSError:
+                continue  # Removed while scanning
+    if progress is not None:
+        progress(scanned)
+
+
+def iter_chunks(items, chunk_size=CHUNK_SIZE):
+    """
+    Yield lists of at most `chunk_size` items from the iterable `items`.
+    """
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_spool_chunks(directory, chunk_size=CHUNK_SIZE, suffix=SPOOL_SUFFIX, progress=None):
+    """
+    Yield lists of at most `chunk_size` SpoolFiles from `directory`.
+    """
+    return iter_chunks(iter_spool(directory, suffix=suffix, progress=progress), chunk_size)
+
+
+def newest_files(directory, limit, suffix=None, progress=None):
+    """
+    The `limit` most recently modified files of `directory`, newest first,
+    keeping only `limit` entries in memory. Returns (files, total matched).
+    """
+    total = [0]
+
+    def counted():
+        for spool_file in iter_spool(directory, suffix=suffix, progress=progress):
+            total[0] += 1
+            yield spool_file
+
+    files = heapq.nlargest(limit, counted(), key=lambda f: f.mtime)
+    return files, total[0]
@@ -0,0 +1,107 @@
+import os
+import threading
+
+DEFAULT_DB_NAME = "LMS_002"
+
+
+def load_from_env():
+    """
+    Session from ATOMWALK_AUTH_TOKEN / ATOMWALK_USER_NAME, for headless runs.
+    """
+    return os.environ.get("ATOMWALK_AUTH_TOKEN", ""), os.environ.get("ATOMWALK_USER_NAME", "")
+
+
+def db_name_for(user_name, default=DEFAULT_DB_NAME):
+    """
+    ERP database of a login name ("user@DB" -> "DB").
+    """
+    if user_name and "@" in user_name:
+        return user_name.split("@")[-1]
+    return default
+
+
+class TokenProvider:
+    """
+    Process-wide cache of the login session (bearer token and user name).
+
+    The session is read once through `loader` (a callable returning
+    (token, user_name)) and served from memory afterwards. It changes only
+    when the login window calls set() or clear(), or when invalidate()
+    forces a reload; subscribers are called with (token, user_name) on
+    every change. No Qt import is needed: the Qt app installs a QSettings
+    loader, headless runs use the environment.
+    """
+
+    def __init__(self, loader=load_from_env):
+        self._loader = loader
+        self._session = None
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def set_loader(self, loader):
+        with self._lock:
+            self._loader = loader
+            self._session = None
+
+    def _get_session(self):
+        session = self._session
+        if session is None:
+            with self._lock:
+                if self._session is None:
+                    token, user_name = self._loader()
+                    self._session = (token or "", user_name or "")
+                session = self._session
+        return session
+
+    def get_token(self):
+        return self._get_session()[0]
+
+    def get_user_name(self):
+        return self._get_session()[1]
+
+    def get_db_name(self, default=DEFAULT_DB_NAME):
+        return db_name_for(self.get_user_name(), default)
+
+    def subscribe(self, callback):
+        with self._lock:
+            self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def _notify(self, session):
+        with self._lock:
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback(*session)
+            except Exception as e:
+                print(f"⚠️ Token listener failed: {e}")
+
+    def set(self, token, user_name=None):
+        """
+        Store a new session. `user_name` None keeps the current user.
+        """
+        if user_name is None:
+            user_name = self.get_user_name()
+        session = (token or "", user_name or "")
+        with self._lock:
+            changed = session != self._session
+            self._session = session
+        if changed:
+            self._notify(session)
+
+    def clear(self):
+        self.set("", "")
+
+    def invalidate(self):
+        """
+        Drop the cached session; the next read goes to the loader again.
+        """
+        with self._lock:
+            self._session = None
+
+
+token_provider = TokenProvider()
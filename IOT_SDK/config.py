@@ -1,8 +1,13 @@
 # IOT SDK Configuration for Expense Claim API
-API_URL = "https://crm.atomwalk.com/hr_api/add_claim/PMA_00001/"
-#AUTH_TOKEN = "d795ca107b331ca6136d00eb7d781ec5540224b3"
-#EMP_ID = "EMP-015"
-#PIN = "1234"
+import os
+
+from Atomwalk_sdk_interface.utils.endpoints import erp_url
+
+# IOT_API_URL overrides the whole URL (e.g. a local mock ERP)
+API_URL = os.environ.get("IOT_API_URL") or erp_url("hr_api/add_claim/PMA_00001/")
+# Claim API credentials come from the environment, never from this file
+AUTH_TOKEN = os.environ.get("IOT_AUTH_TOKEN", "")
+EMP_ID = os.environ.get("IOT_EMP_ID", "")
 
 # Sensor Configuration
 SENSOR_TYPE = 22  # DHT22
@@ -19,4 +24,14 @@ DEFAULT_PROJECT_ID = None  # Can be set if needed
 
 # File Configuration
 SENSOR_DATA_FILENAME = "sensor_data.txt"
-SENSOR_DATA_MIMETYPE = "text/plain"
\ No newline at end of file
+SENSOR_DATA_MIMETYPE = "text/plain"
+
+# Request timeouts, retries and circuit breaker for the claim API
+CONNECT_TIMEOUT = 5        # seconds
+READ_TIMEOUT = 30          # seconds
+RETRY_ATTEMPTS = 4
+RETRY_BASE_DELAY = 0.5     # seconds, doubled per attempt, full jitter
+RETRY_MAX_DELAY = 10.0
+REQUEST_DEADLINE = 60.0    # total budget per claim, retries included
+BREAKER_THRESHOLD = 5
+BREAKER_RESET = 30.0
@@ -1,7 +1,50 @@
 import requests
 import json
 import io
-from .config import API_URL, AUTH_TOKEN, EMP_ID, PIN
+import time
+from .config import (
+    API_URL, AUTH_TOKEN, EMP_ID,
+    CONNECT_TIMEOUT, READ_TIMEOUT, RETRY_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY,
+    REQUEST_DEADLINE, BREAKER_THRESHOLD, BREAKER_RESET
+)
+from Atomwalk_sdk_interface.utils.retry import (
+    CircuitBreaker, CircuitOpenError, RetryPolicy, call_with_retry, RETRYABLE_STATUSES
+)
+from Atomwalk_sdk_interface.utils.metrics import counter, gauge, histogram
+
+retry_policy = RetryPolicy(
+    max_attempts=RETRY_ATTEMPTS,
+    base_delay=RETRY_BASE_DELAY,
+    max_delay=RETRY_MAX_DELAY,
+    deadline=REQUEST_DEADLINE,
+)
+claim_breaker = CircuitBreaker("IOT claim API", failure_threshold=BREAKER_THRESHOLD, reset_timeout=BREAKER_RESET)
+
+erp_requests = counter("erp_requests_total", "ERP calls by final status", ["sdk", "status"])
+erp_request_seconds = histogram("erp_request_seconds", "ERP call latency, retries included", ["sdk"])
+erp_attempt_seconds = histogram("erp_attempt_seconds", "Latency of single HTTP attempts", ["sdk"])
+erp_sent_bytes = counter("erp_sent_bytes_total", "Request body bytes sent to the ERP", ["sdk"])
+erp_in_flight = gauge("erp_in_flight", "ERP calls currently in progress", ["sdk"])
+
+# CLAIM_SAVE creates a new claim on every request and has no idempotency
+# key, so a request is only sent again when the server certainly did not
+# act on it: it was refused (429/503) or the connection never opened
+CLAIM_RETRY_STATUSES = frozenset({429, 503})
+
+
+def _not_sent(error):
+    """
+    True if `error` happened before the request reached the server.
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if isinstance(error, requests.ConnectionError) and error.args:
+        # Connect failures arrive wrapped in urllib3's MaxRetryError; errors
+        # after the request went out (reset, aborted response) do not
+        from urllib3.exceptions import NewConnectionError
+
+        return isinstance(getattr(error.args[0], "reason", None), NewConnectionError)
+    return False
 
 def send_to_erp(formatted_data, file_path=None, use_auth=True):
     """
@@ -77,8 +120,31 @@ def send_to_erp(formatted_data, file_path=None, use_auth=True):
     print("Form Data:", data)
     print("File Data:", "Present" if files else "None")
     
+    def post(timeout):
+        # Rewind the in-memory file so every attempt uploads it in full
+        for _, file_obj, _ in files.values():
+            file_obj.seek(0)
+        with erp_attempt_seconds.labels("iot").time():
+            response = requests.post(API_URL, headers=headers, data=data, files=files,
+                                     timeout=timeout)
+        erp_sent_bytes.labels("iot").inc(len(response.request.body or b""))
+        return response
+
+    status = "error"
+    in_flight = erp_in_flight.labels("iot")
+    in_flight.inc()
+    started = time.perf_counter()
     try:
-        response = requests.post(API_URL, headers=headers, data=data, files=files)
+        response = call_with_retry(
+            post,
+            retry_policy,
+            breaker=claim_breaker,
+            is_failure=lambda response: response.status_code in RETRYABLE_STATUSES,
+            is_retryable=lambda response: response.status_code in CLAIM_RETRY_STATUSES,
+            is_retryable_error=_not_sent,
+            timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+        )
+        status = response.status_code
         print("Response Code:", response.status_code)
         print("Response:", response.text)
         
@@ -95,7 +161,15 @@ def send_to_erp(formatted_data, file_path=None, use_auth=True):
         else:
             print(f"❌ Data upload failed. Code: {response.status_code}")
             return None
-            
+
+    except CircuitOpenError:
+        status = "circuit_open"
+        print("⛔ Claim API circuit is open after repeated failures - not sending.")
+        return None
     except Exception as e:
         print(f"❌ Error sending data: {str(e)}")
         return None
+    finally:
+        in_flight.dec()
+        erp_request_seconds.labels("iot").observe(time.perf_counter() - started)
+        erp_requests.labels("iot", status).inc()
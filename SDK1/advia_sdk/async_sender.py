@@ -0,0 +1,49 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from SDK1.advia_sdk.config import ERP_MAX_IN_FLIGHT
+from SDK1.advia_sdk.sender import send_to_erp
+
+
+async def send_many_async(payloads, api_url, token, max_in_flight=ERP_MAX_IN_FLIGHT, on_result=None, send=send_to_erp):
+    """
+    Send payloads to the ERP with at most `max_in_flight` requests open.
+
+    `payloads` may be a lazy iterable; it is only consumed as slots free
+    up. Blocking HTTP calls run on a thread pool sharing the pooled
+    session. `on_result(index, payload, status_code, response)` is called
+    on the event loop's thread as each request completes.
+
+    Returns (succeeded, failed) counts.
+    """
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(max_in_flight)
+    counts = [0, 0]
+    pending = set()
+
+    async def send_one(index, payload):
+        try:
+            status_code, response = await loop.run_in_executor(executor, send, payload, api_url, token)
+        finally:
+            slots.release()
+        counts[0 if status_code == 200 else 1] += 1
+        if on_result is not None:
+            on_result(index, payload, status_code, response)
+
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="erp-send") as executor:
+        for index, payload in enumerate(payloads):
+            await slots.acquire()
+            task = asyncio.ensure_future(send_one(index, payload))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.gather(*pending)
+
+    return counts[0], counts[1]
+
+
+def send_many(payloads, api_url, token, max_in_flight=ERP_MAX_IN_FLIGHT, on_result=None, send=send_to_erp):
+    """
+    Blocking wrapper around send_many_async for non-async callers.
+    """
+    return asyncio.run(send_many_async(payloads, api_url, token, max_in_flight, on_result, send))
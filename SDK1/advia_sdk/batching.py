@@ -0,0 +1,128 @@
+import json
+import time
+
+from SDK1.advia_sdk.config import (
+    ERP_BATCH_MIN, ERP_BATCH_MAX, ERP_BATCH_TARGET_LATENCY, ERP_BATCH_MAX_BYTES
+)
+from SDK1.advia_sdk.formatter import ErpBatch
+from SDK1.advia_sdk.sender import send_to_erp
+
+
+class AdaptiveBatchSize:
+    """
+    Additive-increase / multiplicative-decrease batch size controller.
+
+    The size grows by one record after every fast, successful batch and is
+    halved when a batch fails or takes longer than `target_latency`.
+    """
+
+    def __init__(self, minimum=ERP_BATCH_MIN, maximum=ERP_BATCH_MAX, target_latency=ERP_BATCH_TARGET_LATENCY, initial=None):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.size = initial or max(minimum, min(maximum, 10))
+
+    def record(self, latency, ok):
+        if ok and latency <= self.target_latency:
+            self.size = min(self.maximum, self.size + 1)
+        else:
+            self.size = max(self.minimum, self.size // 2)
+
+
+def _record_statuses(status_code, response, count):
+    """
+    Map a batch response back to one status code per record.
+
+    If the ERP returns {"results": [{"status": ...}, ...]} with one entry
+    per record, those statuses are used; otherwise the HTTP status applies
+    to every record in the batch.
+    """
+    if status_code == 200:
+        try:
+            results = json.loads(response).get("results")
+        except (ValueError, AttributeError):
+            results = None
+        if isinstance(results, list) and len(results) == count:
+            statuses = []
+            for item in results:
+                status = item.get("status", 200) if isinstance(item, dict) else item
+                if status in ("success", "ok", True):
+                    status = 200
+                try:
+                    statuses.append(int(status))
+                except (TypeError, ValueError):
+                    statuses.append(500)
+            return statuses
+    return [status_code] * count
+
+
+class BatchSender:
+    """
+    Coalesces results into multi-record ADD_TEST requests.
+
+    Payloads are grouped into batches whose size follows an
+    AdaptiveBatchSize and never exceeds ERP_BATCH_MAX_BYTES of JSON. With
+    group_by="rat_no" a batch never mixes animals. A batch rejected as a
+    whole with a client error (4xx other than auth/rate limiting) is split
+    in half and resent until the failing records are isolated; server and
+    connection errors fail the whole batch without extra requests.
+    """
+
+    def __init__(self, api_url, token, sizer=None, group_by=None, max_bytes=ERP_BATCH_MAX_BYTES, send=send_to_erp):
+        self.api_url = api_url
+        self.token = token
+        self.sizer = sizer or AdaptiveBatchSize()
+        self.group_by = group_by
+        self.max_bytes = max_bytes
+        self.requests = 0
+        self._send = send
+
+    def send(self, payloads, on_result=None):
+        """
+        Send all payloads; returns (succeeded, failed) counts.
+        `on_result(index, payload, status_code, response)` is called per record.
+        """
+        counts = [0, 0]
+        batch = []
+        batch_bytes = 0
+        group = None
+
+        for index, payload in enumerate(payloads):
+            size = len(payload.record_json()) + 2
+            key = payload.entry[self.group_by] if self.group_by else None
+            if batch and (len(batch) >= self.sizer.size
+                          or batch_bytes + size > self.max_bytes
+                          or key != group):
+                self._send_batch(batch, on_result, counts)
+                batch, batch_bytes = [], 0
+            batch.append((index, payload))
+            batch_bytes += size
+            group = key
+
+        if batch:
+            self._send_batch(batch, on_result, counts)
+        return counts[0], counts[1]
+
+    def _send_batch(self, batch, on_result, counts):
+        if len(batch) == 1:
+            body = batch[0][1]
+        else:
+            body = ErpBatch(payload for _, payload in batch)
+
+        started = time.monotonic()
+        status_code, response = self._send(body, self.api_url, self.token)
+        self.requests += 1
+        statuses = _record_statuses(status_code, response, len(batch))
+        self.sizer.record(time.monotonic() - started, status_code == 200)
+
+        if len(batch) > 1 and 400 <= status_code < 500 and status_code not in (401, 403, 429):
+            # Whole batch rejected: bisect to find the records at fault
+            middle = len(batch) // 2
+            self._send_batch(batch[:middle], on_result, counts)
+            self._send_batch(batch[middle:], on_result, counts)
+            return
+
+        for (index, payload), status in zip(batch, statuses):
+            counts[0 if status == 200 else 1] += 1
+            if on_result is not None:
+                on_result(index, payload, status, response)
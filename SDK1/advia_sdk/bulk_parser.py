@@ -0,0 +1,109 @@
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from SDK1.advia_sdk.models import AstmResult
+from SDK1.advia_sdk.parser import parse_astm_iter
+from SDK1.advia_sdk.priority import PriorityCheck
+
+# Files handed to a worker per task; keeps IPC overhead low for small files
+DEFAULT_FILES_PER_TASK = 32
+
+
+class AstmColumns:
+    """
+    Column-oriented parse results for many ASTM files.
+
+    Instead of one dict per result, every field is kept in its own list.
+    Results of file `paths[i]` occupy rows offsets[i]:offsets[i + 1], and
+    `priority[i]` tells whether the file holds an urgent sample.
+    Files that could not be read are listed in `errors` with the reason.
+    """
+
+    def __init__(self):
+        self.paths = []
+        self.offsets = array('Q', [0])
+        self.rat_no = []
+        self.test_name = []
+        self.test_value = []
+        self.device_id = []
+        self.priority = []
+        self.errors = {}
+
+    def __len__(self):
+        return len(self.test_name)
+
+    def add_file(self, path, rat_no, test_name, test_value, device_id, error=None, priority=False):
+        self.paths.append(path)
+        self.priority.append(priority)
+        self.rat_no.extend(rat_no)
+        self.test_name.extend(test_name)
+        self.test_value.extend(test_value)
+        self.device_id.extend(device_id)
+        self.offsets.append(len(self.test_name))
+        if error is not None:
+            self.errors[path] = error
+
+    def file_rows(self, index):
+        """
+        Yield the results of the index-th file as AstmResult rows.
+        """
+        for row in range(self.offsets[index], self.offsets[index + 1]):
+            yield AstmResult(self.rat_no[row], self.test_name[row], self.test_value[row], self.device_id[row])
+
+    def rows(self):
+        for index in range(len(self.paths)):
+            yield from self.file_rows(index)
+
+
+def _parse_files(paths):
+    """
+    Worker task: parse a group of files into plain column lists.
+    """
+    parsed = []
+    for path in paths:
+        rat_no, test_name, test_value, device_id = [], [], [], []
+        error = None
+        check = PriorityCheck()
+        try:
+            with open(path, "rb") as f:
+                for entry in parse_astm_iter(f, on_record=check):
+                    rat_no.append(entry.rat_no)
+                    test_name.append(entry.test_name)
+                    test_value.append(entry.test_value)
+                    device_id.append(entry.device_id)
+        except Exception as e:
+            rat_no, test_name, test_value, device_id = [], [], [], []
+            error = str(e)
+        parsed.append((path, rat_no, test_name, test_value, device_id, error, check.urgent))
+    return parsed
+
+
+def parse_astm_many(paths, workers=None, files_per_task=DEFAULT_FILES_PER_TASK):
+    """
+    Parse many ASTM files in parallel and return an AstmColumns.
+
+    Files are distributed over a process pool of `workers` processes
+    (default: one per CPU). Result order follows the order of `paths`.
+    """
+    paths = list(paths)
+    columns = AstmColumns()
+    if not paths:
+        return columns
+
+    workers = workers or os.cpu_count() or 1
+    groups = [paths[i:i + files_per_task] for i in range(0, len(paths), files_per_task)]
+
+    if workers == 1 or len(groups) == 1:
+        # Not worth spawning processes
+        for parsed in map(_parse_files, groups):
+            for item in parsed:
+                columns.add_file(*item)
+        return columns
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(groups))) as pool:
+        for parsed in pool.map(_parse_files, groups):
+            for item in parsed:
+                columns.add_file(*item)
+
+    return columns
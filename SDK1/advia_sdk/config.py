@@ -1,31 +1,193 @@
-from PyQt5.QtCore import QSettings
+import json
+import os
+from functools import lru_cache
+
+from Atomwalk_sdk_interface.utils.endpoints import erp_url
+from Atomwalk_sdk_interface.utils.token_provider import token_provider, load_from_env
+
+# Every UPPER_CASE setting below can be overridden from a JSON file named by
+# ADVIA_CONFIG and from ADVIA_<NAME> environment variables (see _apply_overrides).
+
+def _qsettings():
+    # PyQt is only imported when a setting actually needs it
+    from PyQt5.QtCore import QSettings
+    return QSettings("Atomwalk", "LogInApp")
+
+def _load_session():
+    token, user_name = load_from_env()
+    if token:
+        return token, user_name
+    try:
+        settings = _qsettings()
+    except ImportError:
+        return token, user_name
+    return settings.value("auth_token", ""), settings.value("user_name", "")
+
+# QSettings is read once; LoginWindow updates the provider on login/logout
+token_provider.set_loader(_load_session)
 
 def get_bearer_token():
-    settings = QSettings("Atomwalk", "LogInApp")
-    return settings.value("auth_token", "")
+    return token_provider.get_token()
+
+@lru_cache(maxsize=None)
+def _api_endpoint_for(db_name):
+    # ADVIA_API_ENDPOINT overrides the whole URL (e.g. a local mock ERP)
+    return os.environ.get("ADVIA_API_ENDPOINT") or erp_url(f"lab_api/process_glp_test_data/{db_name}/")
 
-# Get db_name from QSettings for dynamic API endpoint
-settings = QSettings("Atomwalk", "LogInApp")
-user_name = settings.value("user_name", "")
-if user_name and "@" in user_name:
-    db_name = user_name.split("@")[-1]
-else:
-    db_name = "LMS_002"  # fallback to default
+def get_api_endpoint():
+    """
+    ADD_TEST URL for the database of the logged-in user.
+    """
+    return _api_endpoint_for(token_provider.get_db_name())
 
-API_ENDPOINT = f"https://crm.atomwalk.com/lab_api/process_glp_test_data/{db_name}/"
+# Optional ERP URL serving the ADVIA -> ERP test-name mapping (None = local file only)
+TEST_MAPPING_URL = None
 
 # Other constants
 INCOMING_DIR = r"C:/Users/WIN11 24H2/Desktop/Atomwalk/Advia_Interface/SDK1/input_files"
 PROCESSED_DIR = r"C:/Users/WIN11 24H2/Desktop/Atomwalk/Advia_Interface/SDK1/processed_to_ERP"
+# Runtime databases (outbox, parse cache); kept out of the installed code
+STATE_DIR = os.path.join(os.path.expanduser("~"), ".atomwalk", "advia")
+PROXY_BACKUP_DIR = r"C:/Users/WIN11 24H2/Desktop/Atomwalk/Advia_Interface/advia_proxy/backup"
+PROXY_PROCESSED_DIR = r"C:/Users/WIN11 24H2/Desktop/Atomwalk/Advia_Interface/advia_proxy/processed"
 SERIAL_PORT = "COM4"
 BAUDRATE = 9600
 
-TCP_IP = settings.value("tcp_ip", "127.0.0.1")
+# Backlogs of at least this many files are parsed up front in a process pool
+BULK_PARSE_THRESHOLD = 50
+PARSE_WORKERS = None  # None = one per CPU
+
+# ERP HTTP connection pool
+ERP_POOL_SIZE = 10        # raised to PIPELINE_SENDERS * ERP_MAX_IN_FLIGHT if that is larger
+ERP_CONNECT_TIMEOUT = 5   # seconds
+ERP_READ_TIMEOUT = 30     # seconds
+ERP_MAX_IN_FLIGHT = 8     # concurrent ADD_TEST requests per sender worker
+
+# ERP retries and circuit breaker
+ERP_RETRY_ATTEMPTS = 4
+ERP_RETRY_BASE_DELAY = 0.5     # seconds, doubled per attempt, full jitter
+ERP_RETRY_MAX_DELAY = 10.0
+ERP_REQUEST_DEADLINE = 60.0    # total budget per result, retries included
+ERP_BREAKER_THRESHOLD = 5      # consecutive failures before the circuit opens
+ERP_BREAKER_RESET = 30.0       # seconds before probing the ERP again
+
+# Delivered outbox rows (and the journal of archived files) are kept this long
+OUTBOX_RETENTION_DAYS = 30
+
+# Idempotency keys the ERP already confirmed, remembered locally
+ERP_CONFIRMED_KEYS_MAX = 100000
+
+# Multi-record ADD_TEST requests ({"test_data": [...]}); off by default
+ERP_BATCH_MODE = False
+ERP_BATCH_GROUP_BY = None          # None = per file, "rat_no" = per animal
+ERP_BATCH_MIN = 1
+ERP_BATCH_MAX = 200
+ERP_BATCH_TARGET_LATENCY = 2.0     # seconds per batch before shrinking
+ERP_BATCH_MAX_BYTES = 512 * 1024
+
+# Staged file pipeline: worker threads per stage and queue length between stages
+PIPELINE_READERS = 1
+PIPELINE_PARSERS = 2
+PIPELINE_SENDERS = 2         # each sends up to ERP_MAX_IN_FLIGHT requests at once
+PIPELINE_QUEUE_SIZE = 8
+
+# Scheduling: files are processed oldest first, STAT samples ahead of the backlog
+STAT_PRIORITIES = ("S", "A")  # O-record priority codes treated as urgent (STAT, ASAP)
+STAT_RAT_NO_PATTERN = None     # optional regex on rat_no marking urgent animals, e.g. r"^STAT"
+STAT_RESCAN_INTERVAL = 5.0     # seconds between looks for new STAT files during a run
+
+# Watch mode: keep delivering files as they arrive after the startup run
+WATCH_MODE = True
+WATCH_DEBOUNCE = 1.0         # seconds a spool file must stay unchanged before it is read
+WATCH_POLL_INTERVAL = 2.0    # rescan interval; the only trigger when watchdog is missing
+WATCH_RETRY_INTERVAL = 60.0  # seconds between retries of files still waiting for delivery
+
+# Prometheus text endpoint at http://METRICS_HOST:METRICS_PORT/metrics (None = off)
+METRICS_PORT = None
+METRICS_HOST = "127.0.0.1"
+
+DEFAULT_TCP_IP = "127.0.0.1"
+DEFAULT_TCP_PORT = 9200
+
+
+def _tcp_setting(name):
+    env = os.environ.get(f"ADVIA_{name}")
+    if env:
+        return env
+    try:
+        settings = _qsettings()
+    except ImportError:
+        return None
+    return settings.value(name.lower())
+
+def _tcp_port():
+    tcp_port_value = _tcp_setting("TCP_PORT")
+    # Safe conversion with error handling
+    try:
+        return int(tcp_port_value) if tcp_port_value else DEFAULT_TCP_PORT
+    except (ValueError, TypeError):
+        print(f"⚠️ Invalid tcp_port value in QSettings: '{tcp_port_value}'. Using default port {DEFAULT_TCP_PORT}.")
+        return DEFAULT_TCP_PORT
+
+def __getattr__(name):
+    # Values that come from QSettings or the login are resolved on first use,
+    # so importing this module never needs Qt
+    if name == "API_ENDPOINT":
+        return get_api_endpoint()
+    if name == "db_name":
+        return token_provider.get_db_name()
+    if name == "TCP_IP":
+        return _tcp_setting("TCP_IP") or DEFAULT_TCP_IP
+    if name == "TCP_PORT":
+        return _tcp_port()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _coerce(value, default):
+    if isinstance(default, bool):
+        return str(value).strip().lower() in ("1", "true", "yes", "on")
+    if isinstance(default, int):
+        return int(value)
+    if isinstance(default, float):
+        return float(value)
+    if isinstance(default, tuple):
+        return tuple(v.strip() for v in value.split(",") if v.strip())
+    if default is None:
+        if value.lower() in ("", "none", "null"):
+            return None
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return value
+
+def _apply_overrides():
+    """
+    Override settings from the ADVIA_CONFIG JSON file, then from ADVIA_<NAME>
+    environment variables, e.g. ADVIA_INCOMING_DIR=/srv/advia/in.
+    """
+    names = {name for name, value in globals().items() if name.isupper() and not callable(value)}
+    path = os.environ.get("ADVIA_CONFIG")
+    if path:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                overrides = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not read ADVIA_CONFIG {path}: {e}")
+            overrides = {}
+        for name, value in overrides.items():
+            if name in names:
+                globals()[name] = tuple(value) if isinstance(value, list) else value
+            else:
+                print(f"⚠️ Unknown setting {name} in {path}")
+
+    for name in names:
+        value = os.environ.get(f"ADVIA_{name}")
+        if value is None:
+            continue
+        try:
+            globals()[name] = _coerce(value, globals()[name])
+        except ValueError:
+            print(f"⚠️ Invalid value for ADVIA_{name}: {value!r}")
 
-# Safe conversion with error handling
-try:
-    tcp_port_value = settings.value("tcp_port", "9200")
-    TCP_PORT = int(tcp_port_value) if tcp_port_value else 9200
-except (ValueError, TypeError):
-    print(f"⚠️ Invalid tcp_port value in QSettings: '{tcp_port_value}'. Using default port 9200.")
-    TCP_PORT = 9200
\ No newline at end of file
+_apply_overrides()
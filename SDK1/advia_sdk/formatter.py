@@ -1,26 +1,187 @@
+import json
+import time
 from datetime import datetime
+from json.encoder import encode_basestring_ascii
 
-# 🧠 Mapping test names from ADVIA to ERP-expected names
-TEST_NAME_MAPPING = {
-    "RBC": "Measuring weight",
-    "WBC": "White Cell Count",
-    "HGB": "Hemoglobin Level"
+from Atomwalk_sdk_interface.utils.metrics import counter, histogram
+from SDK1.advia_sdk.test_mapping import DEFAULT_TEST_NAME_MAPPING, get_mapping
+
+# 🧠 Built-in ADVIA -> ERP test names; the live table is in test_name_mapping.json
+TEST_NAME_MAPPING = DEFAULT_TEST_NAME_MAPPING
+
+format_seconds = histogram("advia_format_seconds", "Time spent building the ERP payloads of one file or result")
+formatted_payloads = counter("advia_format_payloads_total", "ERP payloads built")
+
+# Fixed part of every ADD_TEST payload; only the per-result fields vary
+PAYLOAD_TEMPLATE = {
+    "test_type_id": 1,
+    "call_mode": "ADD_TEST",
+    "group_id": 1,
+    "remarks": " "
 }
 
+# Per-result fields, in the order to_dict() adds them after the template
+RESULT_FIELDS = ("test_name", "rat_no", "test_time", "test_date", "test_value")
+
+
+def _record_template():
+    # The fixed fields are encoded once, the per-result ones left as %s
+    parts = [f"{json.dumps(name)}: {json.dumps(value)}".replace("%", "%%")
+             for name, value in PAYLOAD_TEMPLATE.items()]
+    parts.extend(f"{json.dumps(name)}: %s" for name in RESULT_FIELDS)
+    return "{" + ", ".join(parts) + "%s}"
+
+
+# The payload pre-rendered as JSON from PAYLOAD_TEMPLATE, so serializing a
+# result only has to encode the fields that change; same keys and order as
+# to_dict(), plus a slot for the optional idempotency key
+_RECORD_TEMPLATE = _record_template()
+
+
+def _json_value(value):
+    if isinstance(value, str):
+        return encode_basestring_ascii(value)
+    return json.dumps(value)
+
+
+def format_timestamp(now=None):
+    """
+    Return the (test_time, test_date) strings for a batch of results.
+    """
+    now = now or datetime.now()
+    return now.strftime("%I:%M %p"), now.strftime("%d-%m-%Y")
+
+
+class ErpPayload:
+    """
+    Lazily built ERP payload for a single parsed entry.
+
+    Holds only a reference to the entry, the batch timestamp strings and
+    the test-name mapping snapshot of its batch; the nested
+    {"test_data": {...}} dict is built when the payload is read, and
+    to_json() renders straight from a pre-built template. An optional
+    idempotency key is sent along as test_data["idempotency_key"].
+    """
+
+    __slots__ = ('entry', 'test_time', 'test_date', 'names', 'idempotency_key')
+
+    def __init__(self, entry, test_time, test_date, names=None, idempotency_key=None):
+        self.entry = entry
+        self.test_time = test_time
+        self.test_date = test_date
+        self.names = names or get_mapping()
+        self.idempotency_key = idempotency_key
+
+    @property
+    def test_name(self):
+        return self.names.get(self.entry['test_name'])
+
+    def to_dict(self):
+        entry = self.entry
+        test_data = dict(PAYLOAD_TEMPLATE)
+        test_data["test_name"] = self.test_name
+        test_data["rat_no"] = entry['rat_no']
+        test_data["test_time"] = self.test_time
+        test_data["test_date"] = self.test_date
+        test_data["test_value"] = entry['test_value']
+        if self.idempotency_key:
+            test_data["idempotency_key"] = self.idempotency_key
+        return {"test_data": test_data}
+
+    def record_json(self):
+        """
+        Render the inner test_data object as JSON bytes.
+        """
+        entry = self.entry
+        return (_RECORD_TEMPLATE % (
+            _json_value(self.test_name),
+            _json_value(entry['rat_no']),
+            _json_value(self.test_time),
+            _json_value(self.test_date),
+            _json_value(entry['test_value']),
+            f', "idempotency_key": {_json_value(self.idempotency_key)}' if self.idempotency_key else '',
+        )).encode("ascii")
+
+    def to_json(self):
+        return b'{"test_data": ' + self.record_json() + b'}'
+
+    def idempotency_keys(self):
+        return [self.idempotency_key] if self.idempotency_key else []
+
+    def __getitem__(self, key):
+        return self.to_dict()[key]
+
+    def __eq__(self, other):
+        if isinstance(other, ErpPayload):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"ErpPayload({self.to_dict()!r})"
+
+
+class ErpBatch:
+    """
+    Several payloads sent as one multi-record request:
+    {"test_data": [{...}, {...}, ...]}
+    """
+
+    __slots__ = ('payloads',)
+
+    def __init__(self, payloads):
+        self.payloads = list(payloads)
+
+    def __len__(self):
+        return len(self.payloads)
+
+    def to_dict(self):
+        return {"test_data": [payload.to_dict()["test_data"] for payload in self.payloads]}
+
+    def to_json(self):
+        return b'{"test_data": [' + b", ".join(payload.record_json() for payload in self.payloads) + b']}'
+
+    def idempotency_keys(self):
+        return [key for payload in self.payloads for key in payload.idempotency_keys()]
+
+    def __repr__(self):
+        return f"ErpBatch({len(self.payloads)} records)"
+
+
+def make_idempotency_key(file_digest, seq, salt=""):
+    """
+    Deterministic key for the seq-th result of a file with the given
+    sha256 digest; the same result always gets the same key. A `salt`
+    (e.g. one per replay) gives the result a key of its own.
+    """
+    key = f"{file_digest[:32]}-{seq}"
+    return f"{key}-{salt}" if salt else key
+
+
 def format_for_erp(entry):
-    now = datetime.now()
-    mapped_test_name = TEST_NAME_MAPPING.get(entry['test_name'], entry['test_name'])
-
-    return {
-        "test_data": {
-            "test_type_id": 1,
-            "call_mode": "ADD_TEST",
-            "group_id": 1,
-            "test_name": mapped_test_name,
-            "rat_no": entry['rat_no'],
-            "test_time": now.strftime("%I:%M %p"),
-            "test_date": now.strftime("%d-%m-%Y"),
-            "test_value": entry['test_value'],
-            "remarks": " "
-        }
-    }
+    with format_seconds.time():
+        payload = ErpPayload(entry, *format_timestamp())
+    formatted_payloads.inc()
+    return payload
+
+def format_for_erp_iter(entries, now=None):
+    """
+    Lazily pair each parsed entry with its ERP payload.
+    The timestamp and mapping are resolved once for the whole run.
+    """
+    started = time.perf_counter()
+    test_time, test_date = format_timestamp(now)
+    names = get_mapping()
+    spent = time.perf_counter() - started
+    count = 0
+    try:
+        for entry in entries:
+            started = time.perf_counter()
+            payload = ErpPayload(entry, test_time, test_date, names)
+            count += 1
+            spent += time.perf_counter() - started
+            yield entry, payload
+    finally:
+        format_seconds.observe(spent)
+        formatted_payloads.inc(count)
@@ -0,0 +1,43 @@
+class AstmResult:
+    """
+    One parsed test result.
+
+    Uses __slots__ so millions of results don't each carry a dict. Still
+    supports the old dict-style access (entry['rat_no'], entry.get(...))
+    used throughout the SDK.
+    """
+
+    __slots__ = ('rat_no', 'test_name', 'test_value', 'device_id')
+
+    def __init__(self, rat_no, test_name, test_value, device_id):
+        self.rat_no = rat_no
+        self.test_name = test_name
+        self.test_value = test_value
+        self.device_id = device_id
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        if key not in self.__slots__:
+            return default
+        return getattr(self, key)
+
+    def keys(self):
+        return self.__slots__
+
+    def as_dict(self):
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __eq__(self, other):
+        if isinstance(other, AstmResult):
+            return all(getattr(self, key) == getattr(other, key) for key in self.__slots__)
+        if isinstance(other, dict):
+            return self.as_dict() == other
+        return NotImplemented
+
+    def __repr__(self):
+        return (f"AstmResult(rat_no={self.rat_no!r}, test_name={self.test_name!r}, "
+                f"test_value={self.test_value!r}, device_id={self.device_id!r})")
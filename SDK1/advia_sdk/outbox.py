@@ -0,0 +1,369 @@
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from Atomwalk_sdk_interface.utils.retry import RETRYABLE_STATUSES
+from SDK1.advia_sdk.config import STATE_DIR
+from SDK1.advia_sdk.formatter import ErpPayload, make_idempotency_key
+from SDK1.advia_sdk.models import AstmResult
+
+OUTBOX_DB_PATH = Path(STATE_DIR) / "outbox.db"
+# Where older versions kept it, inside the source tree
+LEGACY_DB_PATH = Path(__file__).resolve().parent.parent / "outbox.db"
+# Rejections by the ERP (non-retryable responses, e.g. 400) after which a
+# result is given up on and marked dead
+MAX_ATTEMPTS = 10
+# Transient failures (5xx, 429, timeouts, connection errors, open circuit)
+# never count as attempts; a result failing only that way goes dead once
+# it is this old
+MAX_AGE_DAYS = 7
+CLAIM_CHUNK = 500
+# A claim is a lease: rows in flight for longer than this are taken to be
+# abandoned (the process died) and recover() returns them to pending.
+# Rows of a live sender are never taken away from it before then.
+CLAIM_LEASE = 15 * 60  # seconds
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+SENT = "sent"
+DEAD = "dead"
+
+# A file is identified by its name and the sha256 of its content, so a new
+# file that reuses an old name is queued and sent as a file of its own
+OUTBOX_COLUMNS_SQL = """
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    file_name TEXT NOT NULL,
+    file_digest TEXT NOT NULL DEFAULT '',
+    seq INTEGER NOT NULL,
+    rat_no TEXT,
+    test_name TEXT,
+    test_value TEXT,
+    device_id TEXT,
+    test_time TEXT,
+    test_date TEXT,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_status INTEGER,
+    last_response TEXT,
+    created_at REAL,
+    updated_at REAL,
+    idempotency_key TEXT,
+    UNIQUE (file_name, file_digest, seq)
+"""
+
+# File milestones in the checkpoint journal, in order
+QUEUED = "queued"        # parsed, every result in the outbox
+DELIVERED = "delivered"  # every result accepted by the ERP
+ARCHIVED = "archived"    # moved to the processed folder
+
+
+def _adopt_legacy_db(old, new):
+    """
+    Move an outbox left in the source tree to `new`, so results it still
+    holds are delivered. Only done while `new` doesn't exist yet.
+    """
+    if new.exists() or not old.exists():
+        return
+    for suffix in ("", "-wal", "-shm"):
+        source = Path(f"{old}{suffix}")
+        if source.exists():
+            shutil.move(str(source), f"{new}{suffix}")
+    print(f"📦 Moved the outbox from {old} to {new}.")
+
+
+class OutboxPayload(ErpPayload):
+    """
+    An ErpPayload rebuilt from an outbox row, remembering the row id.
+    """
+
+    __slots__ = ('outbox_id', 'seq')
+
+    def __init__(self, outbox_id, seq, entry, test_time, test_date, idempotency_key=None):
+        super().__init__(entry, test_time, test_date, idempotency_key=idempotency_key)
+        self.outbox_id = outbox_id
+        self.seq = seq
+
+
+class Outbox:
+    """
+    Durable, per-result delivery queue in SQLite (WAL mode).
+
+    Every parsed result of a file becomes one row with a delivery state:
+    pending -> in_flight -> sent, or back to pending on failure. A result
+    the ERP rejected `max_attempts` times, or that has failed transiently
+    for `max_age_days`, is dead; an ERP outage alone never uses up
+    attempts. requeue_dead() gives dead rows another chance. Rows left
+    in_flight by a crash are returned to pending by recover().
+
+    Next to it, an append-only checkpoint journal records per-file
+    milestones (queued, delivered, archived), which outlive purged rows.
+
+    A non-empty `key_salt` is mixed into every idempotency key, so results
+    sent again on purpose (replays) are not taken for duplicates.
+    """
+
+    def __init__(self, db_path=OUTBOX_DB_PATH, max_attempts=MAX_ATTEMPTS, max_age_days=MAX_AGE_DAYS, key_salt=""):
+        self.max_attempts = max_attempts
+        self.max_age_days = max_age_days
+        self.key_salt = key_salt
+        self._lock = threading.RLock()
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        if Path(db_path) == OUTBOX_DB_PATH:
+            _adopt_legacy_db(LEGACY_DB_PATH, OUTBOX_DB_PATH)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_name TEXT NOT NULL,
+                milestone TEXT NOT NULL,
+                detail TEXT,
+                created_at REAL,
+                file_digest TEXT NOT NULL DEFAULT ''
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_checkpoints_file ON checkpoints (file_name, id)")
+        if "file_digest" not in {row[1] for row in self.conn.execute("PRAGMA table_info(checkpoints)")}:
+            # Older journals: a milestone belongs to the file last queued under its name
+            self.conn.execute("ALTER TABLE checkpoints ADD COLUMN file_digest TEXT NOT NULL DEFAULT ''")
+            self.conn.execute("""
+                UPDATE checkpoints SET file_digest = COALESCE((
+                    SELECT q.detail FROM checkpoints q
+                    WHERE q.file_name = checkpoints.file_name AND q.milestone = ? AND q.id <= checkpoints.id
+                    ORDER BY q.id DESC LIMIT 1
+                ), '')
+            """, (QUEUED,))
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(outbox)")]
+        if columns and "file_digest" not in columns:
+            self._rebuild_keyed_by_digest(columns)
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS outbox ({OUTBOX_COLUMNS_SQL})")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_file_state ON outbox (file_name, state)")
+        self.conn.commit()
+
+    def _rebuild_keyed_by_digest(self, columns):
+        # Outboxes of older versions are unique per (file_name, seq); their
+        # rows take the digest recorded with the file's latest queued checkpoint
+        self.conn.execute(f"CREATE TABLE outbox_rebuilt ({OUTBOX_COLUMNS_SQL})")
+        names = ", ".join(columns)
+        self.conn.execute(f"""
+            INSERT INTO outbox_rebuilt ({names}, file_digest)
+            SELECT {names}, COALESCE((
+                SELECT c.detail FROM checkpoints c
+                WHERE c.file_name = outbox.file_name AND c.milestone = ?
+                ORDER BY c.id DESC LIMIT 1
+            ), '') FROM outbox
+        """, (QUEUED,))
+        self.conn.execute("DROP TABLE outbox")
+        self.conn.execute("ALTER TABLE outbox_rebuilt RENAME TO outbox")
+
+    def recover(self, lease=CLAIM_LEASE):
+        """
+        Return rows left in flight to pending once their claim is older
+        than `lease` seconds, e.g. rows of a run that crashed.
+        """
+        now = time.time()
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                "UPDATE outbox SET state = ?, updated_at = ? WHERE state = ? AND updated_at < ?",
+                (PENDING, now, IN_FLIGHT, now - lease)
+            )
+        return cursor.rowcount
+
+    @staticmethod
+    def _file_filter(file_name, file_digest):
+        # Rows of one version of a file, or of every file with that name
+        if file_digest is None:
+            return "file_name = ?", [file_name]
+        return "file_name = ? AND file_digest = ?", [file_name, file_digest]
+
+    def has_file(self, file_name, file_digest=None):
+        where, params = self._file_filter(file_name, file_digest)
+        with self._lock:
+            row = self.conn.execute(f"SELECT 1 FROM outbox WHERE {where} LIMIT 1", params).fetchone()
+        return row is not None
+
+    def enqueue(self, file_name, payloads, file_digest=None):
+        """
+        Store a file's payloads and its queued checkpoint in one
+        transaction. Re-enqueueing a file is a no-op for results that are
+        already in the outbox. With the file's sha256 `file_digest`, rows
+        are kept apart from those of other files with the same name and
+        every row gets an idempotency key.
+        """
+        now = time.time()
+        rows = (
+            (file_name, file_digest or "", seq,
+             p.entry['rat_no'], p.entry['test_name'], p.entry['test_value'],
+             p.entry['device_id'], p.test_time, p.test_date,
+             make_idempotency_key(file_digest, seq, self.key_salt) if file_digest else None, now, now)
+            for seq, p in enumerate(payloads)
+        )
+        with self._lock, self.conn:
+            self.conn.executemany("""
+                INSERT OR IGNORE INTO outbox
+                    (file_name, file_digest, seq, rat_no, test_name, test_value, device_id,
+                     test_time, test_date, idempotency_key, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            self._add_checkpoint(file_name, file_digest, QUEUED, file_digest or "", now)
+
+    def claim(self, file_name, after_id=0, limit=CLAIM_CHUNK, file_digest=None):
+        """
+        Mark up to `limit` pending rows of a file as in flight and return
+        them as OutboxPayloads, in sequence order.
+        """
+        where, params = self._file_filter(file_name, file_digest)
+        with self._lock, self.conn:
+            # Outboxes of other threads or processes share the database: take
+            # the write lock before reading, so no row is claimed twice
+            self.conn.execute("BEGIN IMMEDIATE")
+            rows = self.conn.execute(f"""
+                SELECT id, seq, rat_no, test_name, test_value, device_id, test_time, test_date, idempotency_key
+                FROM outbox WHERE {where} AND state = ? AND id > ?
+                ORDER BY id LIMIT ?
+            """, params + [PENDING, after_id, limit]).fetchall()
+            self.conn.executemany(
+                "UPDATE outbox SET state = ?, updated_at = ? WHERE id = ?",
+                ((IN_FLIGHT, time.time(), row[0]) for row in rows)
+            )
+        return [
+            OutboxPayload(row[0], row[1], AstmResult(row[2], row[3], row[4], row[5]), row[6], row[7], row[8])
+            for row in rows
+        ]
+
+    def iter_claims(self, file_name, limit=CLAIM_CHUNK, file_digest=None):
+        """
+        Claim and yield every pending row of a file, one chunk at a time.
+        Rows that fail during this pass are not picked up again by it.
+        """
+        last_id = 0
+        while True:
+            chunk = self.claim(file_name, after_id=last_id, limit=limit, file_digest=file_digest)
+            if not chunk:
+                return
+            yield from chunk
+            last_id = chunk[-1].outbox_id
+
+    def mark_sent(self, outbox_id, status_code, response=""):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE outbox SET state = ?, last_status = ?, last_response = ?, updated_at = ? WHERE id = ?",
+                (SENT, status_code, str(response)[:500], time.time(), outbox_id)
+            )
+
+    def mark_failed(self, outbox_id, status_code, response=""):
+        """
+        Return a row to pending after a failed send, or mark it dead. Only
+        non-retryable responses count as attempts.
+        """
+        rejected = 1 if status_code not in RETRYABLE_STATUSES else 0
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute("""
+                UPDATE outbox
+                SET attempts = attempts + ?,
+                    state = CASE WHEN attempts + ? >= ? OR created_at < ? THEN ? ELSE ? END,
+                    last_status = ?, last_response = ?, updated_at = ?
+                WHERE id = ?
+            """, (rejected, rejected, self.max_attempts, now - self.max_age_days * 86400, DEAD, PENDING,
+                  status_code, str(response)[:500], now, outbox_id))
+
+    def requeue_dead(self, file_name=None):
+        """
+        Give dead rows (of one file, or all) a fresh set of attempts.
+        Returns the number of rows requeued.
+        """
+        now = time.time()
+        query = "UPDATE outbox SET state = ?, attempts = 0, created_at = ?, updated_at = ? WHERE state = ?"
+        params = [PENDING, now, now, DEAD]
+        if file_name is not None:
+            query += " AND file_name = ?"
+            params.append(file_name)
+        with self._lock, self.conn:
+            cursor = self.conn.execute(query, params)
+        return cursor.rowcount
+
+    def dead_files(self):
+        """
+        Files with at least one dead row.
+        """
+        with self._lock:
+            rows = self.conn.execute("SELECT DISTINCT file_name FROM outbox WHERE state = ?", (DEAD,)).fetchall()
+        return [row[0] for row in rows]
+
+    def _add_checkpoint(self, file_name, file_digest, milestone, detail, now):
+        self.conn.execute(
+            "INSERT INTO checkpoints (file_name, file_digest, milestone, detail, created_at) VALUES (?, ?, ?, ?, ?)",
+            (file_name, file_digest or "", milestone, str(detail)[:500], now)
+        )
+
+    def checkpoint(self, file_name, milestone, detail="", file_digest=None):
+        """
+        Append a milestone for a file (the version with `file_digest`) to
+        the journal.
+        """
+        with self._lock, self.conn:
+            self._add_checkpoint(file_name, file_digest, milestone, detail, time.time())
+
+    def last_checkpoint(self, file_name, file_digest=None):
+        """
+        The latest milestone recorded for a file, or None. With
+        `file_digest`, only that version of the file counts, so a new file
+        reusing an old name starts from scratch.
+        """
+        where, params = self._file_filter(file_name, file_digest)
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT milestone FROM checkpoints WHERE {where} ORDER BY id DESC LIMIT 1", params
+            ).fetchone()
+        return row[0] if row else None
+
+    def unfinished_files(self):
+        """
+        Files that were queued but not yet fully delivered, e.g. by a run
+        that crashed or was closed midway.
+        """
+        with self._lock:
+            rows = self.conn.execute("""
+                SELECT DISTINCT c.file_name FROM checkpoints c
+                JOIN (SELECT MAX(id) AS id FROM checkpoints GROUP BY file_name, file_digest) last
+                  ON c.id = last.id
+                WHERE c.milestone = ?
+            """, (QUEUED,)).fetchall()
+        return [row[0] for row in rows]
+
+    def file_summary(self, file_name, file_digest=None):
+        """
+        Return {state: count} for a file's rows.
+        """
+        where, params = self._file_filter(file_name, file_digest)
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT state, COUNT(*) FROM outbox WHERE {where} GROUP BY state", params
+            ).fetchall()
+        return dict(rows)
+
+    def purge_sent(self, older_than_days=30):
+        """
+        Delete rows delivered more than `older_than_days` ago, and the
+        journal of files archived before then. Returns the rows deleted.
+        """
+        cutoff = time.time() - older_than_days * 86400
+        with self._lock, self.conn:
+            cursor = self.conn.execute("DELETE FROM outbox WHERE state = ? AND updated_at < ?", (SENT, cutoff))
+            self.conn.execute("""
+                DELETE FROM checkpoints WHERE (file_name, file_digest) IN (
+                    SELECT c.file_name, c.file_digest FROM checkpoints c
+                    JOIN (SELECT MAX(id) AS id FROM checkpoints GROUP BY file_name, file_digest) last
+                      ON c.id = last.id
+                    WHERE c.milestone = ? AND c.created_at < ?
+                )
+            """, (ARCHIVED, cutoff))
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from SDK1.advia_sdk.config import STATE_DIR
+from SDK1.advia_sdk.models import AstmResult
+from SDK1.advia_sdk.parser import parse_astm_iter
+from SDK1.advia_sdk.priority import PriorityCheck
+
+CACHE_DB_PATH = Path(STATE_DIR) / "parse_cache.db"
+MAX_ENTRIES = 5000
+# Bigger files are streamed and never cached, to keep memory flat
+MAX_FILE_BYTES = 4 * 1024 * 1024
+
+# advia_<date>_<time>_<ms>_<uuid8>_<sha256[:8]>.astm, as written by the listeners
+_SPOOL_NAME = re.compile(r"^advia_\d{8}_\d{6}_\d{3}_[0-9a-f]{8}_([0-9a-f]{8})\.astm$")
+
+
+def file_sha256(path):
+    """
+    sha256 hex digest of a file's content, read in 1 MB chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(path, digest=None):
+    """
+    Build the cache key for a spool file.
+
+    Files named by the listeners already carry a sha256 prefix of their
+    content, so only a stat is needed; for anything else the content is
+    hashed, unless its sha256 `digest` is passed in. Size (and mtime for
+    named files) guard against reuse of a name.
+    """
+    st = os.stat(path)
+    match = _SPOOL_NAME.match(os.path.basename(path))
+    if match:
+        return f"{match.group(1)}:{st.st_size}:{st.st_mtime_ns}"
+
+    return f"{digest or file_sha256(path)}:{st.st_size}"
+
+
+class ParseCache:
+    """
+    Persistent, LRU-evicted cache of parse results keyed on file content.
+    Safe to share between threads.
+    """
+
+    def __init__(self, db_path=CACHE_DB_PATH, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS parse_cache (
+                key TEXT PRIMARY KEY,
+                results TEXT,
+                last_used REAL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_parse_cache_last_used ON parse_cache (last_used)")
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(parse_cache)")}
+        if "priority" not in columns:
+            # 1 = urgent (STAT lane), 0 = routine, NULL = not known
+            self.conn.execute("ALTER TABLE parse_cache ADD COLUMN priority INTEGER")
+        self.conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self.conn.execute("SELECT results FROM parse_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE parse_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+        return [AstmResult(*values) for values in json.loads(row[0])]
+
+    def put(self, key, results, priority=None):
+        rows = [[r.rat_no, r.test_name, r.test_value, r.device_id] for r in results]
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO parse_cache (key, results, last_used, priority) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(rows, separators=(",", ":")), time.time(),
+                 None if priority is None else int(bool(priority)))
+            )
+            self._evict()
+            self.conn.commit()
+
+    def priority(self, key):
+        """
+        Whether the file was urgent when it was parsed; None if unknown.
+        """
+        with self._lock:
+            row = self.conn.execute("SELECT priority FROM parse_cache WHERE key = ?", (key,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return bool(row[0])
+
+    def cached_priority(self, path):
+        """
+        Lane lookup for the scheduler: only listener-named files, whose
+        key needs just a stat, are looked up. Anything else is unknown.
+        """
+        if not _SPOOL_NAME.match(os.path.basename(path)):
+            return None
+        try:
+            return self.priority(cache_key(path))
+        except OSError:
+            return None
+
+    def contains(self, key):
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM parse_cache WHERE key = ?", (key,)).fetchone() is not None
+
+    def _evict(self):
+        count = self.conn.execute("SELECT COUNT(*) FROM parse_cache").fetchone()[0]
+        if count > self.max_entries:
+            self.conn.execute("""
+                DELETE FROM parse_cache WHERE key IN (
+                    SELECT key FROM parse_cache ORDER BY last_used LIMIT ?
+                )
+            """, (count - self.max_entries,))
+
+    def iter_results(self, path):
+        """
+        Yield the parse results of `path`, parsing it only on a cache miss.
+        """
+        key = cache_key(path)
+        cached = self.get(key)
+        if cached is not None:
+            yield from cached
+            return
+
+        if os.path.getsize(path) > MAX_FILE_BYTES:
+            with open(path, "rb") as f:
+                yield from parse_astm_iter(f)
+            return
+
+        check = PriorityCheck()
+        with open(path, "rb") as f:
+            results = list(parse_astm_iter(f, on_record=check))
+        self.put(key, results, priority=check.urgent)
+        yield from results
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
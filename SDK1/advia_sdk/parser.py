@@ -1,4 +1,9 @@
 import re
+import time
+
+from Atomwalk_sdk_interface.utils.metrics import SIZE_BUCKETS, counter, histogram
+from SDK1.advia_sdk.models import AstmResult
+from SDK1.advia_sdk.records import DEFAULT_DELIMITERS, Delimiters, make_record
 
 # Control characters for ASTM E1381
 STX = '\x02'
@@ -7,50 +12,330 @@ EOT = '\x04'
 ENQ = '\x05'
 ACK = '\x06'
 NAK = '\x15'
+ETB = '\x17'
 CR = '\x0D'
 LF = '\x0A'
 
+parse_seconds = histogram("advia_parse_seconds", "Time spent parsing one ASTM message or file")
+parse_message_bytes = histogram("advia_parse_message_bytes", "Size of parsed ASTM messages", buckets=SIZE_BUCKETS)
+parse_bytes = counter("advia_parse_bytes_total", "ASTM bytes parsed")
+parse_results = counter("advia_parse_results_total", "Test results parsed")
+
+# Byte-level scanners used by the E1381 decoder
+_IDLE_STOP = re.compile(b"[\x02\x04\x05\x06\x0a\x0d\x15]")
+_FRAME_STOP = re.compile(b"[\x02\x03\x04\x05\x17]")
+
+# Read size used when parsing from file objects
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Decoder states
+_IDLE = 0
+_FRAME = 1
+_CHECKSUM = 2
+_TRAILER = 3
+
+
+class E1381Decoder:
+    """
+    Incremental ASTM E1381 decoder.
+
+    Raw bytes are pushed in with feed() in chunks of any size, and complete
+    E1394 records (bytes, without the terminating CR) come out as soon as
+    they are available. Frames continued with ETB are reassembled, frame
+    checksums are verified and retransmitted duplicate frames are dropped.
+    Unframed input (plain E1394 lines) is passed through line by line.
+
+    A frame that fails its checksum or is cut off is only harmless if the
+    sender retransmits it, i.e. the next good frame carries the expected
+    frame number. Otherwise (a gap in frame numbers, or the message ends
+    first) the half-built record is thrown away and input is skipped up
+    to the next record boundary, so no record is ever stitched together
+    from frames on both sides of a lost one.
+    """
+
+    def __init__(self, verify_checksum=True):
+        self.verify_checksum = verify_checksum
+        self.frames = 0
+        self.bad_frames = 0
+        self._state = _IDLE
+        self._frame = bytearray()
+        self._terminator = 0
+        self._checksum = bytearray()
+        self._record = bytearray()
+        self._last_fn = None
+        self._bad_pending = False  # a frame was lost; waiting for its retransmission
+        self._resync = False       # skipping text up to the next record boundary
+
+    def feed(self, data):
+        """
+        Consume a chunk of raw bytes and yield every record it completes.
+        """
+        pos = 0
+        end = len(data)
+
+        while pos < end:
+            state = self._state
+
+            if state == _IDLE:
+                match = _IDLE_STOP.search(data, pos)
+                if not match:
+                    self._record += data[pos:]
+                    return
+                stop = match.start()
+                self._record += data[pos:stop]
+                byte = data[stop]
+                pos = stop + 1
+
+                if byte == 0x02:
+                    self._state = _FRAME
+                    self._frame.clear()
+                elif byte in (0x0D, 0x0A):
+                    yield from self._flush_record()
+                elif byte == 0x04:
+                    yield from self._end_message()
+                elif byte == 0x05:
+                    self._end_message_silently()
+
+            elif state == _FRAME:
+                match = _FRAME_STOP.search(data, pos)
+                if not match:
+                    self._frame += data[pos:]
+                    return
+                stop = match.start()
+                self._frame += data[pos:stop]
+                byte = data[stop]
+                pos = stop + 1
+
+                if byte in (0x03, 0x17):
+                    self._terminator = byte
+                    self._checksum.clear()
+                    self._state = _CHECKSUM
+                elif byte == 0x02:
+                    # New STX before the frame ended: the partial frame is lost
+                    self.bad_frames += 1
+                    self._bad_pending = True
+                    self._frame.clear()
+                else:
+                    # ENQ/EOT inside a frame aborts it
+                    self.bad_frames += 1
+                    self._state = _IDLE
+                    self._end_message_silently()
+
+            elif state == _CHECKSUM:
+                take = min(2 - len(self._checksum), end - pos)
+                self._checksum += data[pos:pos + take]
+                pos += take
+                if len(self._checksum) == 2:
+                    self._state = _TRAILER
+                    yield from self._accept_frame()
+
+            else:
+                # Skip the CR LF that closes a frame
+                while pos < end and data[pos] in (0x0D, 0x0A):
+                    pos += 1
+                if pos < end:
+                    self._state = _IDLE
+
+    def close(self):
+        """
+        Flush whatever is left once the input is exhausted.
+        """
+        if self._state in (_FRAME, _CHECKSUM):
+            self.bad_frames += 1
+            self._bad_pending = True
+        self._state = _IDLE
+        yield from self._end_message()
+
+    def _end_message(self):
+        # EOT: the last record is complete unless a frame of it was lost
+        if self._bad_pending:
+            self._record.clear()
+        else:
+            yield from self._flush_record()
+        self._end_message_silently()
+
+    def _end_message_silently(self):
+        self._record.clear()
+        self._last_fn = None
+        self._bad_pending = False
+        self._resync = False
+
+    def _drop_partial_record(self):
+        self._record.clear()
+        self._resync = True
+
+    def _accept_frame(self):
+        body = self._frame
+        if self.verify_checksum and not _checksum_ok(body, self._terminator, self._checksum):
+            self.bad_frames += 1
+            self._bad_pending = True
+            return
+
+        text = body
+        if body[:1].isdigit():
+            fn = body[0] - 0x30
+            if fn == self._last_fn:
+                # Retransmission of a frame we already accepted
+                return
+            if self._last_fn is None:
+                if self._bad_pending:
+                    self._drop_partial_record()  # Can't tell what was lost
+            elif fn != (self._last_fn + 1) % 8:
+                self.bad_frames += 1
+                self._drop_partial_record()      # Frames went missing
+            self._last_fn = fn
+            text = body[1:]
+        elif self._bad_pending:
+            self._drop_partial_record()
+        self._bad_pending = False
+
+        self.frames += 1
+        if self._resync:
+            boundary = text.find(b"\r")
+            if boundary < 0:
+                if self._terminator == 0x03:
+                    self._resync = False  # ETX ends the record too
+                return
+            text = text[boundary + 1:]
+            self._resync = False
+
+        record = self._record
+        record += text
+
+        start = 0
+        while True:
+            stop = record.find(b"\r", start)
+            if stop < 0:
+                break
+            if stop > start:
+                yield bytes(record[start:stop])
+            start = stop + 1
+        del record[:start]
+
+        if self._terminator == 0x03:
+            yield from self._flush_record()
+
+    def _flush_record(self):
+        record = bytes(self._record)
+        self._record.clear()
+        if record.strip():
+            yield record
+
+
+def _checksum_ok(body, terminator, checksum):
+    try:
+        expected = int(checksum, 16)
+    except ValueError:
+        return False
+    return (sum(body) + terminator) & 0xFF == expected
+
+
+def iter_records(chunks, verify_checksum=True):
+    """
+    Decode an iterable of raw byte chunks into E1394 records in one pass.
+    """
+    decoder = E1381Decoder(verify_checksum=verify_checksum)
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+    yield from decoder.close()
+
+
+def iter_e1394_records(chunks, verify_checksum=True):
+    """
+    Decode raw byte chunks into E1394 Record objects.
+
+    Delimiters are taken from each H record and apply to every following
+    record of that message.
+    """
+    delimiters = DEFAULT_DELIMITERS
+    for raw in iter_records(chunks, verify_checksum=verify_checksum):
+        if raw[:1] == b'H':
+            delimiters = Delimiters.from_header(raw)
+        yield make_record(raw, delimiters)
+
+
+def _to_bytes(raw_data):
+    if isinstance(raw_data, str):
+        return raw_data.encode("utf-8")
+    return bytes(raw_data)
+
+
 def strip_control_chars(raw_data):
     """
     Remove ASTM E1381 framing and extract pure E1394 message block.
     """
-    # Extract text between STX and ETX (ASTM frame)
-    pattern = re.compile(rf"{STX}(.*?){ETX}.*?", re.DOTALL)
-    match = pattern.search(raw_data)
+    return [record.decode("utf-8", errors="replace") for record in iter_records([_to_bytes(raw_data)])]
 
-    if match:
-        clean_data = match.group(1)
-        # Split lines on carriage return
-        return clean_data.strip().split(CR)
-    else:
-        # If no framing detected, assume it's plain E1394 lines
-        return raw_data.strip().splitlines()
+def _iter_chunks(source, chunk_size):
+    if isinstance(source, (bytes, bytearray, memoryview, str)):
+        yield _to_bytes(source)
+        return
 
-def parse_astm(raw_data):
+    read = getattr(source, "read", None)
+    if read is None:
+        for chunk in source:
+            yield _to_bytes(chunk)
+        return
+
+    while True:
+        chunk = read(chunk_size)
+        if not chunk:
+            break
+        yield _to_bytes(chunk)
+
+
+def _counted(chunks, size):
+    for chunk in chunks:
+        size[0] += len(chunk)
+        yield chunk
+
+
+def parse_astm_iter(source, chunk_size=DEFAULT_CHUNK_SIZE, on_record=None):
     """
-    Parse raw ASTM data (E1381 or E1394) and return a list of test results.
+    Lazily parse ASTM data and yield test results one at a time.
+
+    `source` may be an open file (binary or text), an iterable of byte
+    chunks, or a complete str/bytes message. Files are read in chunks of
+    `chunk_size`, so memory use stays constant regardless of file size and
+    the first result is available before the whole file has been read.
+    `on_record(record)`, if given, sees every decoded record on the way.
     """
-    results = []
     rat_no = None
     device_id = None
-    lines = strip_control_chars(raw_data)
-
-    for line in lines:
-        parts = line.split('|')
-
-        if line.startswith('H|'):
-            device_id = parts[4]
-        elif line.startswith('P|'):
-            rat_no = parts[3]  # Usually where animal/patient ID is stored
-
-        elif line.startswith('R|'):
-            test_name = parts[2].split('^')[-1]
-            test_value = parts[3]
-            results.append({
-                'rat_no': rat_no,
-                'test_name': test_name,
-                'test_value': test_value,
-                'device_id' : device_id
-                  })
-
-    return results
+    size = [0]
+    results = 0
+    # Parse time excludes the time the caller spends between results
+    spent = 0.0
+    resumed = time.perf_counter()
+
+    try:
+        for record in iter_e1394_records(_counted(_iter_chunks(source, chunk_size), size)):
+            record_type = record.type
+            if on_record is not None:
+                on_record(record)
+
+            if record_type == 'H':
+                device_id = record.sender_name
+            elif record_type == 'P':
+                rat_no = record.patient_id  # Usually where animal/patient ID is stored
+
+            elif record_type == 'R':
+                result = AstmResult(rat_no, record.test_name, record.value, device_id)
+                results += 1
+                spent += time.perf_counter() - resumed
+                resumed = None
+                yield result
+                resumed = time.perf_counter()
+    finally:
+        if resumed is not None:
+            spent += time.perf_counter() - resumed
+        parse_seconds.observe(spent)
+        parse_message_bytes.observe(size[0])
+        parse_bytes.inc(size[0])
+        parse_results.inc(results)
+
+def parse_astm(raw_data):
+    """
+    Parse raw ASTM data (E1381 or E1394) and return a list of test results.
+    """
+    return list(parse_astm_iter(raw_data))
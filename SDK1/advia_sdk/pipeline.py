@@ -0,0 +1,137 @@
+import queue
+import threading
+import time
+
+from Atomwalk_sdk_interface.utils.metrics import counter, gauge, histogram
+from SDK1.advia_sdk.config import PIPELINE_QUEUE_SIZE
+
+_DONE = object()  # end-of-stream marker passed between stages
+
+stage_seconds = histogram("advia_pipeline_stage_seconds", "Time a stage spends on one file", ["stage"])
+stage_jobs = counter("advia_pipeline_jobs_total", "Files handled per stage and outcome", ["stage", "outcome"])
+queue_depth = gauge("advia_pipeline_queue_depth", "Files waiting in front of a stage", ["stage"])
+
+
+class FileJob:
+    """
+    One spool file travelling through the pipeline.
+
+    Stages attach what they produce (raw bytes, parse results, outbox
+    summary). A stage that raises records the error on the job; later
+    stages pass failed jobs through untouched so the last one can still
+    report them.
+    """
+
+    __slots__ = ('filename', 'path', 'digest', 'milestone', 'key', 'data', 'results', 'queued', 'sent', 'summary',
+                 'ok', 'error')
+
+    def __init__(self, filename, path):
+        self.filename = filename
+        self.path = path
+        self.digest = None     # sha256 of the content; with the name, the file's identity
+        self.milestone = None  # last checkpoint from a previous run
+        self.key = None        # parse cache key
+        self.data = None       # file content, when read into memory
+        self.results = None    # parsed AstmResults
+        self.queued = False    # results already in the outbox
+        self.sent = 0          # payloads sent in this run
+        self.summary = None    # {state: count} after sending
+        self.ok = False
+        self.error = None
+
+    def __repr__(self):
+        return f"FileJob({self.filename!r}, ok={self.ok!r}, error={self.error!r})"
+
+
+class Stage:
+    """
+    A named step with its own worker threads. `func(job)` runs once per
+    job and returns the job to hand on, or None to drop it. Jobs that
+    already failed skip `func` unless `handles_errors` is set.
+    """
+
+    def __init__(self, name, func, workers=1, handles_errors=False):
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+        self.handles_errors = handles_errors
+
+
+def _run_stage(stage, source, sink, remaining, lock, next_workers):
+    depth = queue_depth.labels(stage.name)
+    timing = stage_seconds.labels(stage.name)
+    while True:
+        job = source.get()
+        depth.set(source.qsize())
+        if job is _DONE:
+            break
+        if job.error is None or stage.handles_errors:
+            started = time.perf_counter()
+            try:
+                job = stage.func(job)
+                outcome = "dropped" if job is None else "ok" if job.error is None else "failed"
+            except Exception as e:
+                print(f"❌ {stage.name} failed for {job.filename}: {e}")
+                job.error = e
+                outcome = "error"
+            timing.observe(time.perf_counter() - started)
+        else:
+            outcome = "skipped"
+        stage_jobs.labels(stage.name, outcome).inc()
+        if job is not None:
+            sink.put(job)
+
+    with lock:
+        remaining[0] -= 1
+        last = remaining[0] == 0
+    if last:
+        # Every worker of this stage is done: close the next queue
+        for _ in range(next_workers):
+            sink.put(_DONE)
+
+
+def run_pipeline(jobs, stages, queue_size=PIPELINE_QUEUE_SIZE):
+    """
+    Push `jobs` through `stages`, each stage on its own threads, joined by
+    bounded queues of `queue_size`. A full queue blocks the stage feeding
+    it, so a slow stage (e.g. the ERP) holds back reading and parsing
+    instead of letting work pile up in memory.
+
+    Returns the jobs that came out of the last stage.
+    """
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+    finished = queue.Queue()
+    threads = []
+
+    for position, stage in enumerate(stages):
+        source = queues[position]
+        last_stage = position == len(stages) - 1
+        sink = finished if last_stage else queues[position + 1]
+        next_workers = 1 if last_stage else stages[position + 1].workers
+        remaining = [stage.workers]
+        lock = threading.Lock()
+        for number in range(stage.workers):
+            thread = threading.Thread(
+                target=_run_stage,
+                args=(stage, source, sink, remaining, lock, next_workers),
+                name=f"advia-{stage.name}-{number}",
+                daemon=True,
+            )
+            thread.start()
+            threads.append(thread)
+
+    first = queues[0]
+    for job in jobs:
+        first.put(job)
+    for _ in range(stages[0].workers):
+        first.put(_DONE)
+
+    done = []
+    while True:
+        job = finished.get()
+        if job is _DONE:
+            break
+        done.append(job)
+    for thread in threads:
+        thread.join()
+    return done
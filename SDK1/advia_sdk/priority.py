@@ -0,0 +1,28 @@
+import re
+
+from SDK1.advia_sdk.config import STAT_PRIORITIES, STAT_RAT_NO_PATTERN
+from SDK1.advia_sdk.records import OrderRecord, PatientRecord
+
+
+class PriorityCheck:
+    """
+    Record callback that notices urgent samples while a file is parsed:
+    an order with an urgent priority code, or a patient whose rat_no
+    matches `rat_no_pattern`. Pass it as parse_astm_iter(on_record=...)
+    and read `urgent` afterwards.
+    """
+
+    __slots__ = ('priorities', 'pattern', 'urgent')
+
+    def __init__(self, priorities=STAT_PRIORITIES, rat_no_pattern=STAT_RAT_NO_PATTERN):
+        self.priorities = {p.upper() for p in priorities}
+        self.pattern = re.compile(rat_no_pattern) if rat_no_pattern else None
+        self.urgent = False
+
+    def __call__(self, record):
+        if self.urgent:
+            return
+        if isinstance(record, OrderRecord):
+            self.urgent = record.priority.strip().upper() in self.priorities
+        elif self.pattern is not None and isinstance(record, PatientRecord):
+            self.urgent = self.pattern.search(record.patient_id) is not None
@@ -3,37 +3,50 @@ import os
 import shutil
 import time
 
-PROXY_BACKUP =r"C:\Users\WIN11 24H2\Desktop\Atomwalk\Advia_Interface\advia_proxy\backup"
-SDK_INPUT =r"C:\Users\WIN11 24H2\Desktop\Atomwalk\Advia_Interface\SDK1\input_files"
-PROXY_PROCESSED =r"C:\Users\WIN11 24H2\Desktop\Atomwalk\Advia_Interface\advia_proxy\processed"
-
-os.makedirs(SDK_INPUT, exist_ok=True)
-os.makedirs(PROXY_PROCESSED, exist_ok=True)
+from Atomwalk_sdk_interface.utils.spool import iter_spool_chunks
+
+from SDK1.advia_sdk.config import INCOMING_DIR, PROXY_BACKUP_DIR, PROXY_PROCESSED_DIR
+
+PROXY_BACKUP = PROXY_BACKUP_DIR
+SDK_INPUT = INCOMING_DIR
+PROXY_PROCESSED = PROXY_PROCESSED_DIR
+
+def pull_file(filename):
+    """
+    Copy one backup file into the SDK input folder and archive it.
+    Returns the path of the file in the SDK input folder.
+    """
+    os.makedirs(SDK_INPUT, exist_ok=True)
+    os.makedirs(PROXY_PROCESSED, exist_ok=True)
+    src = os.path.join(PROXY_BACKUP, filename)
+    dst = os.path.join(SDK_INPUT, filename)
+    archive = os.path.join(PROXY_PROCESSED, filename)
+
+    print(f"Processing {filename}:")
+    print(f"  Source:      {src}")
+    print(f"  Destination: {dst}")
+    print(f"  Archive:     {archive}")
+
+    if not os.path.exists(dst):
+        shutil.copy(src, dst)
+        print(f"✅ Copied {filename} to SDK input")
+    else:
+        print(f"⚠️ Skipped {filename} (already exists in SDK input)")
+
+    shutil.move(src, archive)
+    print(f"📁 Archived {filename} to proxy processed folder")
+    return dst
 
 def pull_from_proxy():
     try:
         print(f"Looking for .astm files in: {PROXY_BACKUP}")
-        files = [f for f in os.listdir(PROXY_BACKUP) if f.endswith(".astm")]
-        print(f"Found files: {files}")
-
-        for filename in files:
-            src = os.path.join(PROXY_BACKUP, filename)
-            dst = os.path.join(SDK_INPUT, filename)
-            archive = os.path.join(PROXY_PROCESSED, filename)
-
-            print(f"Processing {filename}:")
-            print(f"  Source:      {src}")
-            print(f"  Destination: {dst}")
-            print(f"  Archive:     {archive}")
-
-            if not os.path.exists(dst):
-                shutil.copy(src, dst)
-                print(f"✅ Copied {filename} to SDK input")
-            else:
-                print(f"⚠️ Skipped {filename} (already exists in SDK input)")
-
-            shutil.move(src, archive)
-            print(f"📁 Archived {filename} to proxy processed folder")
+        # Streamed from os.scandir, so a huge backup folder is never listed whole
+        pulled = 0
+        for chunk in iter_spool_chunks(PROXY_BACKUP):
+            for spool_file in chunk:
+                pull_file(spool_file.name)
+            pulled += len(chunk)
+        print(f"Pulled {pulled} .astm files from proxy backup")
     except Exception as e:
         print(f"❌ Error in pull_from_proxy: {e}")
 
@@ -0,0 +1,279 @@
+class Delimiters:
+    """
+    E1394 delimiter set, as declared in the second field of the H record
+    (`H|\\^&` -> field '|', repeat '\\', component '^', escape '&').
+    """
+
+    __slots__ = ('field', 'repeat', 'component', 'escape')
+
+    def __init__(self, field=b'|', repeat=b'\\', component=b'^', escape=b'&'):
+        self.field = field
+        self.repeat = repeat
+        self.component = component
+        self.escape = escape
+
+    @classmethod
+    def from_header(cls, raw):
+        """
+        Read the delimiters from a raw H record, falling back to the
+        defaults for anything the header does not declare.
+        """
+        if len(raw) < 2 or raw[:1] != b'H':
+            return DEFAULT_DELIMITERS
+        declared = bytes(raw[1:5])
+        defaults = (b'|', b'\\', b'^', b'&')
+        chars = [declared[i:i + 1] or defaults[i] for i in range(4)]
+        return cls(*chars)
+
+    def __repr__(self):
+        return (f"Delimiters(field={self.field!r}, repeat={self.repeat!r}, "
+                f"component={self.component!r}, escape={self.escape!r})")
+
+
+DEFAULT_DELIMITERS = Delimiters()
+
+
+class Record:
+    """
+    A single E1394 record over its raw bytes.
+
+    Nothing is split up front: field offsets are found on first access and
+    fields are returned as slices of a memoryview over the original buffer,
+    so only the fields that are actually read are ever decoded. Field
+    indexes match `line.split('|')`, i.e. field(0) is the record type.
+    """
+
+    __slots__ = ('raw', 'delimiters', '_view', '_bounds')
+
+    type = None
+
+    def __init__(self, raw, delimiters=DEFAULT_DELIMITERS):
+        self.raw = raw
+        self.delimiters = delimiters
+        self._view = memoryview(raw)
+        self._bounds = None
+
+    @property
+    def record_type(self):
+        return chr(self.raw[0]) if self.raw else ''
+
+    def _field_bounds(self):
+        if self._bounds is None:
+            raw = self.raw
+            sep = self.delimiters.field
+            bounds = []
+            start = 0
+            while True:
+                stop = raw.find(sep, start)
+                if stop < 0:
+                    bounds.append((start, len(raw)))
+                    break
+                bounds.append((start, stop))
+                start = stop + 1
+            self._bounds = bounds
+        return self._bounds
+
+    def __len__(self):
+        return len(self._field_bounds())
+
+    def field_view(self, index):
+        """
+        Return field `index` as a memoryview slice (no copy), or None.
+        """
+        bounds = self._field_bounds()
+        if index >= len(bounds):
+            return None
+        start, stop = bounds[index]
+        return self._view[start:stop]
+
+    def field(self, index, default=''):
+        """
+        Return field `index` decoded to str, with escapes resolved.
+        """
+        view = self.field_view(index)
+        if view is None:
+            return default
+        return self._decode(view)
+
+    def components(self, index):
+        """
+        Return the components of field `index` as a list of str.
+        """
+        view = self.field_view(index)
+        if view is None:
+            return []
+        raw = view.tobytes()
+        return [self._decode(part) for part in raw.split(self.delimiters.component)]
+
+    def component(self, index, position, default=''):
+        parts = self.components(index)
+        if position >= len(parts) or position < -len(parts):
+            return default
+        return parts[position]
+
+    def repeats(self, index):
+        """
+        Return the repeated values of field `index` as a list of str.
+        """
+        view = self.field_view(index)
+        if view is None:
+            return []
+        raw = view.tobytes()
+        return [self._decode(part) for part in raw.split(self.delimiters.repeat)]
+
+    def _decode(self, data):
+        text = str(data, 'utf-8', 'replace')
+        escape = self.delimiters.escape.decode('latin-1')
+        if escape and escape in text:
+            text = _unescape(text, escape, self.delimiters)
+        return text
+
+    def __getitem__(self, index):
+        return self.field(index)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({bytes(self.raw)!r})"
+
+
+def _unescape(text, escape, delimiters):
+    replacements = {
+        'F': delimiters.field.decode('latin-1'),
+        'S': delimiters.component.decode('latin-1'),
+        'R': delimiters.repeat.decode('latin-1'),
+        'E': escape,
+    }
+    for code, char in replacements.items():
+        text = text.replace(f"{escape}{code}{escape}", char)
+    return text
+
+
+class HeaderRecord(Record):
+    __slots__ = ()
+    type = 'H'
+
+    @property
+    def sender_name(self):
+        return self.field(4)
+
+    @property
+    def processing_id(self):
+        return self.field(11)
+
+    @property
+    def version(self):
+        return self.field(12)
+
+    @property
+    def timestamp(self):
+        return self.field(13)
+
+
+class PatientRecord(Record):
+    __slots__ = ()
+    type = 'P'
+
+    @property
+    def sequence(self):
+        return self.field(1)
+
+    @property
+    def practice_patient_id(self):
+        return self.field(2)
+
+    @property
+    def patient_id(self):
+        # Laboratory-assigned ID; ADVIA puts the animal/rat number here
+        return self.field(3)
+
+
+class OrderRecord(Record):
+    __slots__ = ()
+    type = 'O'
+
+    @property
+    def sequence(self):
+        return self.field(1)
+
+    @property
+    def specimen_id(self):
+        return self.field(2)
+
+    @property
+    def test_ids(self):
+        return self.components(4)
+
+    @property
+    def priority(self):
+        return self.field(5)
+
+
+class ResultRecord(Record):
+    __slots__ = ()
+    type = 'R'
+
+    @property
+    def sequence(self):
+        return self.field(1)
+
+    @property
+    def test_name(self):
+        return self.component(2, -1)
+
+    @property
+    def value(self):
+        return self.field(3)
+
+    @property
+    def units(self):
+        return self.field(4)
+
+    @property
+    def flags(self):
+        return self.field(6)
+
+    @property
+    def status(self):
+        return self.field(8)
+
+
+class CommentRecord(Record):
+    __slots__ = ()
+    type = 'C'
+
+    @property
+    def text(self):
+        return self.field(3)
+
+
+class QueryRecord(Record):
+    __slots__ = ()
+    type = 'Q'
+
+    @property
+    def starting_range(self):
+        return self.components(2)
+
+
+class TerminatorRecord(Record):
+    __slots__ = ()
+    type = 'L'
+
+    @property
+    def termination_code(self):
+        return self.field(2)
+
+
+RECORD_TYPES = {
+    cls.type: cls
+    for cls in (HeaderRecord, PatientRecord, OrderRecord, ResultRecord,
+                CommentRecord, QueryRecord, TerminatorRecord)
+}
+
+
+def make_record(raw, delimiters=DEFAULT_DELIMITERS):
+    """
+    Wrap raw record bytes in the Record subclass for its type.
+    """
+    cls = RECORD_TYPES.get(chr(raw[0]) if raw else '', Record)
+    return cls(raw, delimiters)
+
@@ -0,0 +1,232 @@
+import datetime
+import os
+import threading
+import time
+import uuid
+
+from Atomwalk_sdk_interface.utils.spool import iter_spool
+from SDK1.advia_sdk.scheduler import arrival_key
+
+# Pacing modes
+AS_FAST_AS_POSSIBLE = "max"
+FIXED_RATE = "rate"
+REAL_TIME = "speed"
+
+
+def arrival_time(path):
+    """
+    When the analyzer sent the message of an archived spool file, as a
+    Unix timestamp (from the listener's file name, else the mtime).
+    """
+    try:
+        arrived = datetime.datetime.strptime(arrival_key(path), "%Y%m%d%H%M%S%f")
+    except ValueError:
+        return 0.0
+    return arrived.timestamp()
+
+
+def replay_salt():
+    """
+    Idempotency key salt for one replay. Replayed results were delivered
+    before under their plain keys; salted keys let a deduplicating
+    staging ERP accept them again.
+    """
+    return f"replay-{uuid.uuid4().hex[:8]}"
+
+
+class ReplayMessage:
+    """
+    One archived ASTM message, kept in memory so disk reads of the archive
+    don't disturb the pacing.
+    """
+
+    __slots__ = ('source', 'data', 'arrival')
+
+    def __init__(self, source, data, arrival):
+        self.source = source
+        self.data = data
+        self.arrival = arrival
+
+    def __repr__(self):
+        return f"ReplayMessage({os.path.basename(self.source)!r}, {len(self.data)} bytes)"
+
+
+def load_messages(paths, limit=None):
+    """
+    Read the .astm files named by `paths` (files or folders) in arrival
+    order; at most `limit` of them.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(f.path for f in iter_spool(path))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            print(f"⚠️ {path} not found, skipped.")
+    files.sort(key=arrival_time)
+    if limit:
+        files = files[:limit]
+
+    messages = []
+    for path in files:
+        with open(path, "rb") as f:
+            messages.append(ReplayMessage(path, f.read(), arrival_time(path)))
+    return messages
+
+
+def schedule(messages, mode=AS_FAST_AS_POSSIBLE, rate=None, speed=None, max_gap=None):
+    """
+    Send time of each message, in seconds after the start of the replay.
+
+    AS_FAST_AS_POSSIBLE: all at once. FIXED_RATE: `rate` messages per
+    second. REAL_TIME: the original spacing divided by `speed`, with idle
+    gaps (nights, weekends) cut to `max_gap` seconds of original time.
+    """
+    if mode == FIXED_RATE:
+        if not rate or rate <= 0:
+            raise ValueError("A fixed-rate replay needs a rate above 0")
+        return [index / rate for index in range(len(messages))]
+    if mode == REAL_TIME:
+        if not speed or speed <= 0:
+            raise ValueError("A real-time replay needs a speed above 0")
+        offsets = []
+        offset = 0.0
+        previous = None
+        for message in messages:
+            if previous is not None:
+                gap = max(0.0, message.arrival - previous)
+                if max_gap is not None:
+                    gap = min(gap, max_gap)
+                offset += gap / speed
+            previous = message.arrival
+            offsets.append(offset)
+        return offsets
+    if mode == AS_FAST_AS_POSSIBLE:
+        return [0.0] * len(messages)
+    raise ValueError(f"Unknown replay mode {mode!r}")
+
+
+def percentile(sorted_values, q):
+    """
+    Nearest-rank percentile (q in 0..100) of an ascending list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(-(-q * len(sorted_values) // 100)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class ReplayReport:
+    """
+    Outcome of a replay. Latency runs from a message's scheduled send
+    time to the moment its file was archived (or given up on), so time a
+    message spent waiting behind a slow ERP is counted too.
+    """
+
+    def __init__(self, messages, delivered, failed, missing, results, total_bytes, elapsed, latencies, late):
+        self.messages = messages
+        self.delivered = delivered
+        self.failed = failed
+        self.missing = missing          # never completed before the timeout
+        self.results = results
+        self.total_bytes = total_bytes
+        self.elapsed = elapsed
+        self.latencies = sorted(latencies)
+        self.late = late                # worst delay of a send behind its schedule
+        self.notes = []                 # caveats about what the replay covered
+
+    def latency(self, q):
+        return percentile(self.latencies, q)
+
+    @property
+    def messages_per_second(self):
+        return self.messages / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def results_per_second(self):
+        return self.results / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def bytes_per_second(self):
+        return self.total_bytes / self.elapsed if self.elapsed else 0.0
+
+    def format(self):
+        lines = [
+            f"📊 Replayed {self.messages} messages in {self.elapsed:.2f}s: "
+            f"{self.delivered} delivered, {self.failed} failed, {self.missing} unfinished",
+            f"   throughput: {self.messages_per_second:,.1f} msg/s, {self.results_per_second:,.1f} results/s, "
+            f"{self.bytes_per_second / 1024:,.1f} KB/s",
+        ]
+        if self.latencies:
+            lines.append(
+                f"   latency   : p50 {self.latency(50) * 1000:,.0f} ms, p90 {self.latency(90) * 1000:,.0f} ms, "
+                f"p99 {self.latency(99) * 1000:,.0f} ms, max {self.latencies[-1] * 1000:,.0f} ms"
+            )
+        if self.late > 1.0:
+            lines.append(f"   ⚠️ sends fell up to {self.late:.1f}s behind schedule; the offered rate was not reached")
+        lines.extend(f"   ℹ️ {note}" for note in self.notes)
+        return "\n".join(lines)
+
+
+class Replayer:
+    """
+    Plays messages at their scheduled offsets into `receive(index,
+    message)`, which hands a message to the system under test and must
+    return quickly. The system reports each message back through
+    complete(index, ok, results); run() waits for all of them (or
+    `timeout` seconds after the last send) and returns a ReplayReport.
+    """
+
+    def __init__(self, messages, offsets, receive, timeout=300.0):
+        self.messages = messages
+        self.offsets = offsets
+        self.receive = receive
+        self.timeout = timeout
+        self._sent_at = [None] * len(messages)
+        self._done = {}  # index -> (ok, results, latency)
+        self._lock = threading.Lock()
+        self._all_done = threading.Event()
+
+    def complete(self, index, ok, results=0):
+        now = time.monotonic()
+        with self._lock:
+            if index in self._done or self._sent_at[index] is None:
+                return  # Only the first outcome of a message counts
+            self._done[index] = (ok, results, now - self._sent_at[index])
+            if len(self._done) == len(self.messages):
+                self._all_done.set()
+
+    def run(self):
+        if not self.messages:
+            return ReplayReport(0, 0, 0, 0, 0, 0, 0.0, [], 0.0)
+        started = time.monotonic()
+        late = 0.0
+        for index, (message, offset) in enumerate(zip(self.messages, self.offsets)):
+            due = started + offset
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                late = max(late, -delay)
+            with self._lock:
+                # Latency counts from the schedule, not from when we got round to it
+                self._sent_at[index] = due
+            self.receive(index, message)
+
+        self._all_done.wait(self.timeout)
+        elapsed = time.monotonic() - started
+        with self._lock:
+            outcomes = list(self._done.values())
+        delivered = sum(1 for ok, _, _ in outcomes if ok)
+        return ReplayReport(
+            messages=len(self.messages),
+            delivered=delivered,
+            failed=len(outcomes) - delivered,
+            missing=len(self.messages) - len(outcomes),
+            results=sum(results for _, results, _ in outcomes),
+            total_bytes=sum(len(m.data) for m in self.messages),
+            elapsed=elapsed,
+            latencies=[latency for _, _, latency in outcomes],
+            late=late,
+        )
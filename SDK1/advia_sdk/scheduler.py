@@ -0,0 +1,140 @@
+import heapq
+import itertools
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+from Atomwalk_sdk_interface.utils.spool import iter_spool
+from SDK1.advia_sdk.config import STAT_PRIORITIES, STAT_RAT_NO_PATTERN, STAT_RESCAN_INTERVAL, WATCH_DEBOUNCE
+from SDK1.advia_sdk.parse_cache import MAX_FILE_BYTES
+from SDK1.advia_sdk.parser import iter_e1394_records
+from SDK1.advia_sdk.priority import PriorityCheck
+
+STAT = 0
+ROUTINE = 1
+
+# advia_<YYYYMMDD>_<HHMMSS>_<ms>_..., as written by the listeners
+_ARRIVAL = re.compile(r"^advia_(\d{8})_(\d{6})_(\d{3})_")
+_UNKNOWN_ARRIVAL = "9" * 17
+
+
+def arrival_key(path):
+    """
+    Sortable YYYYMMDDHHMMSSmmm arrival time of a spool file, taken from its
+    name, or from its mtime for files not named by the listeners.
+    """
+    match = _ARRIVAL.match(os.path.basename(path))
+    if match:
+        return "".join(match.groups())
+    try:
+        return datetime.fromtimestamp(os.path.getmtime(path)).strftime("%Y%m%d%H%M%S%f")[:17]
+    except OSError:
+        return _UNKNOWN_ARRIVAL
+
+
+def is_priority(path, priorities=STAT_PRIORITIES, rat_no_pattern=STAT_RAT_NO_PATTERN):
+    """
+    True if any order in the file has an urgent priority code, or any
+    patient's rat_no matches `rat_no_pattern`. Only the first
+    MAX_FILE_BYTES of a file are looked at.
+    """
+    check = PriorityCheck(priorities, rat_no_pattern)
+    try:
+        with open(path, "rb") as f:
+            for record in iter_e1394_records([f.read(MAX_FILE_BYTES)]):
+                check(record)
+                if check.urgent:
+                    return True
+    except (OSError, ValueError):
+        pass
+    return False
+
+
+class FileScheduler:
+    """
+    Hands out spool files in delivery order: the STAT lane first, then
+    routine files oldest first.
+
+    `classify(path)` decides the lane of the files given up front; it
+    should be cheap (e.g. a parse cache lookup), since it runs for every
+    file before the first one is handed out. While a run is catching up
+    on a backlog, `directory` is looked at every `rescan_interval`
+    seconds and files that arrived since the scheduler was created
+    (settled for `min_age` seconds) and that `classify_new` finds urgent
+    are slotted in ahead of the remaining backlog. Each new file is
+    classified once; older files (another chunk of the backlog) and new
+    routine files are left for the next run without being read.
+    """
+
+    def __init__(self, files=(), directory=None, rescan_interval=STAT_RESCAN_INTERVAL,
+                 min_age=WATCH_DEBOUNCE, classify=is_priority, classify_new=is_priority):
+        self.directory = directory
+        self.rescan_interval = rescan_interval
+        self.min_age = min_age
+        self._classify = classify
+        self._classify_new = classify_new
+        self._heap = []
+        self._known = set()
+        self._left_for_later = set()  # routine files seen by _rescan
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._next_rescan = time.monotonic() + rescan_interval
+        self._created = time.time()
+        self.promoted = 0
+        for filename in files:
+            self.add(filename)
+
+    def _path(self, filename):
+        return os.path.join(self.directory, filename) if self.directory else filename
+
+    def add(self, filename, lane=None):
+        with self._lock:
+            if filename in self._known:
+                return
+            self._known.add(filename)
+        path = self._path(filename)
+        if lane is None:
+            lane = STAT if self._classify(path) else ROUTINE
+        with self._lock:
+            heapq.heappush(self._heap, (lane, arrival_key(path), next(self._order), filename))
+
+    def _rescan(self):
+        cutoff = time.time() - self.min_age
+        seen = lambda name: name in self._known or name in self._left_for_later
+        try:
+            # Files already scheduled or left for later are not even stat'ed
+            for spool_file in iter_spool(self.directory, skip=seen):
+                if spool_file.mtime > cutoff:
+                    continue  # May still be written
+                if spool_file.mtime < self._created:
+                    # Was there before this run: not a new arrival
+                    self._left_for_later.add(spool_file.name)
+                    continue
+                if self._classify_new(spool_file.path):
+                    self.add(spool_file.name, lane=STAT)
+                    self.promoted += 1
+                    print(f"🚑 STAT file {spool_file.name} moved ahead of the backlog.")
+                else:
+                    self._left_for_later.add(spool_file.name)
+        except OSError:
+            return
+
+    def pop(self):
+        """
+        Next filename to process, or None when the schedule is empty.
+        """
+        if self.directory and time.monotonic() >= self._next_rescan:
+            self._next_rescan = time.monotonic() + self.rescan_interval
+            self._rescan()
+        with self._lock:
+            if not self._heap:
+                return None
+            return heapq.heappop(self._heap)[-1]
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __iter__(self):
+        return iter(self.pop, None)
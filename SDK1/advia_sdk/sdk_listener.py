@@ -1,13 +1,21 @@
 import os
 import datetime
-import serial
 import socket
+import time
 from pathlib import Path
 import uuid
 import hashlib
 
+from Atomwalk_sdk_interface.utils.metrics import SIZE_BUCKETS, counter, histogram
 from advia_sdk.config import INPUT_DIR, LOG_FILE, SERIAL_PORT, BAUDRATE, TCP_IP, TCP_PORT
 
+listener_connections = counter("listener_connections_total", "Analyzer connections accepted", ["listener"])
+listener_messages = counter("listener_messages_total", "ASTM messages received and saved", ["listener"])
+listener_bytes = counter("listener_bytes_total", "Bytes received from the analyzer", ["listener"])
+listener_message_bytes = histogram("listener_message_bytes", "Size of received ASTM messages", ["listener"], buckets=SIZE_BUCKETS)
+listener_save_seconds = histogram("listener_save_seconds", "Time spent writing a received message to disk", ["listener"])
+listener_errors = counter("listener_errors_total", "Listener read errors", ["listener"])
+
 # Ensure the input directory exists
 Path(INPUT_DIR).mkdir(parents=True, exist_ok=True)
 
@@ -22,25 +30,32 @@ def generate_filename(data):
     checksum = hashlib.sha256(data.encode()).hexdigest()[:8]
     return f"advia_{timestamp}_{unique}_{checksum}.astm"
 
-def save_to_input(data):
+def save_to_input(data, listener="sdk_tcp"):
+    started = time.perf_counter()
     filename = generate_filename(data)
     file_path = os.path.join(INPUT_DIR, filename)
     with open(file_path, "w", encoding="utf-8") as f:
         f.write(data)
     log(f"✅ Saved input file: {filename}")
+    listener_save_seconds.labels(listener).observe(time.perf_counter() - started)
+    listener_messages.labels(listener).inc()
+    listener_message_bytes.labels(listener).observe(len(data))
 
 def listen_serial():
     log("🔌 SDK Serial Listener: Listening...")
     try:
+        import serial  # pyserial is only needed in serial mode
         ser = serial.Serial(SERIAL_PORT, BAUDRATE, timeout=5)
         buffer = ""
         while True:
             chunk = ser.read().decode(errors="ignore")
             buffer += chunk
+            listener_bytes.labels("sdk_serial").inc(len(chunk))
             if "\x04" in chunk:  # ASTM EOT
-                save_to_input(buffer)
+                save_to_input(buffer, "sdk_serial")
                 buffer = ""
     except Exception as e:
+        listener_errors.labels("sdk_serial").inc()
         log(f"❌ Serial Read Error: {e}")
 
 def listen_tcp():
@@ -50,17 +65,20 @@ def listen_tcp():
         s.bind((TCP_IP, TCP_PORT))
         s.listen(1)
         conn, addr = s.accept()
+        listener_connections.labels("sdk_tcp").inc()
         log(f"🔗 Connected to {addr}")
         buffer = ""
         while True:
             data = conn.recv(1024).decode(errors="ignore")
             if not data:
                 break
+            listener_bytes.labels("sdk_tcp").inc(len(data))
             buffer += data
             if "\x04" in data:
-                save_to_input(buffer)
+                save_to_input(buffer, "sdk_tcp")
                 buffer = ""
     except Exception as e:
+        listener_errors.labels("sdk_tcp").inc()
         log(f"❌ TCP Read Error: {e}")
 
 if __name__ == "__main__":
@@ -1,13 +1,170 @@
-import requests
+import atexit
+import json
+import threading
+import time
+from collections import OrderedDict
 
-def send_to_erp(data, api_url, token):
+from Atomwalk_sdk_interface.utils.metrics import counter, gauge, histogram
+from Atomwalk_sdk_interface.utils.retry import (
+    CircuitBreaker, RetryPolicy, call_with_retry, RETRYABLE_STATUSES
+)
+from SDK1.advia_sdk.config import (
+    ERP_POOL_SIZE, ERP_MAX_IN_FLIGHT, PIPELINE_SENDERS, ERP_CONNECT_TIMEOUT, ERP_READ_TIMEOUT,
+    ERP_RETRY_ATTEMPTS, ERP_RETRY_BASE_DELAY, ERP_RETRY_MAX_DELAY, ERP_REQUEST_DEADLINE,
+    ERP_BREAKER_THRESHOLD, ERP_BREAKER_RESET, ERP_CONFIRMED_KEYS_MAX
+)
+
+_session = None
+_session_lock = threading.Lock()
+
+retry_policy = RetryPolicy(
+    max_attempts=ERP_RETRY_ATTEMPTS,
+    base_delay=ERP_RETRY_BASE_DELAY,
+    max_delay=ERP_RETRY_MAX_DELAY,
+    deadline=ERP_REQUEST_DEADLINE,
+)
+erp_breaker = CircuitBreaker("ADVIA ERP", failure_threshold=ERP_BREAKER_THRESHOLD, reset_timeout=ERP_BREAKER_RESET)
+
+# Shared with the IOT sender, told apart by the "sdk" label
+erp_requests = counter("erp_requests_total", "ERP calls by final status", ["sdk", "status"])
+erp_request_seconds = histogram("erp_request_seconds", "ERP call latency, retries included", ["sdk"])
+erp_attempt_seconds = histogram("erp_attempt_seconds", "Latency of single HTTP attempts", ["sdk"])
+erp_sent_bytes = counter("erp_sent_bytes_total", "Request body bytes sent to the ERP", ["sdk"])
+erp_in_flight = gauge("erp_in_flight", "ERP calls currently in progress", ["sdk"])
+erp_skipped = counter("advia_erp_skipped_total", "Payloads not sent because their idempotency keys were confirmed")
+
+
+class ConfirmedKeys:
+    """
+    Bounded LRU set of idempotency keys the ERP has already accepted.
+    """
+
+    def __init__(self, maxsize=ERP_CONFIRMED_KEYS_MAX):
+        self.maxsize = maxsize
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        with self._lock:
+            if key in self._keys:
+                self._keys.move_to_end(key)
+                return True
+            return False
+
+    def all_confirmed(self, keys):
+        return bool(keys) and all(key in self for key in keys)
+
+    def add_all(self, keys):
+        with self._lock:
+            for key in keys:
+                self._keys[key] = None
+                self._keys.move_to_end(key)
+            while len(self._keys) > self.maxsize:
+                self._keys.popitem(last=False)
+
+
+confirmed_keys = ConfirmedKeys()
+
+# Every sender worker of the pipeline keeps up to ERP_MAX_IN_FLIGHT requests
+# open on the shared session; a smaller pool would open and discard extra
+# connections on every burst
+POOL_SIZE = max(ERP_POOL_SIZE, PIPELINE_SENDERS * ERP_MAX_IN_FLIGHT)
+
+
+def get_session(pool_size=POOL_SIZE):
+    """
+    Return the shared keep-alive session used for all ERP requests.
+
+    Connections (and their TLS sessions) are reused across results instead
+    of being set up again for every POST.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                # Imported here so that starting the SDK doesn't pay for requests
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def close_session():
+    """
+    Close pooled connections. Safe to call more than once.
+    """
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+atexit.register(close_session)
+
+
+def _post_once(body, api_url, headers, timeout):
+    erp_sent_bytes.labels("advia").inc(len(body))
+    with erp_attempt_seconds.labels("advia").time():
+        try:
+            response = get_session().post(api_url, data=body, headers=headers, timeout=timeout)
+            return response.status_code, response.text
+        except Exception as e:
+            return 500, str(e)
+
+
+def send_to_erp(data, api_url, token, timeout=(ERP_CONNECT_TIMEOUT, ERP_READ_TIMEOUT), retry=True):
+    """
+    POST one payload (or batch) to the ERP.
+
+    Transient failures are retried with exponential backoff and jitter
+    within ERP_REQUEST_DEADLINE. While the ERP circuit is open the call
+    fails fast with 503 instead of waiting on the network. Payloads whose
+    idempotency keys were already confirmed are not sent again.
+    """
     headers = {
         'Content-Type': 'application/json',
         'Authorization': f'Bearer {token}'
     }
+    keys = data.idempotency_keys() if hasattr(data, 'idempotency_keys') else []
+    if confirmed_keys.all_confirmed(keys):
+        erp_skipped.inc()
+        return 200, "Already delivered (idempotency key confirmed); not resent."
+    if len(keys) == 1:
+        headers['Idempotency-Key'] = keys[0]
 
+    in_flight = erp_in_flight.labels("advia")
+    in_flight.inc()
+    started = time.perf_counter()
     try:
-        response = requests.post(api_url, json=data, headers=headers)
-        return response.status_code, response.text
-    except Exception as e:
-        return 500, str(e)
+        # Lazily built payloads serialize themselves
+        body = data.to_json() if hasattr(data, 'to_json') else json.dumps(data).encode("utf-8")
+
+        if not retry:
+            result = _post_once(body, api_url, headers, timeout)
+        else:
+            result = _send_with_retry(body, api_url, headers, timeout)
+    finally:
+        in_flight.dec()
+    erp_request_seconds.labels("advia").observe(time.perf_counter() - started)
+    erp_requests.labels("advia", result[0]).inc()
+
+    if result[0] == 200 and keys:
+        confirmed_keys.add_all(keys)
+    return result
+
+
+def _send_with_retry(body, api_url, headers, timeout):
+    return call_with_retry(
+        lambda attempt_timeout: _post_once(body, api_url, headers, attempt_timeout),
+        retry_policy,
+        breaker=erp_breaker,
+        is_failure=lambda result: result[0] in RETRYABLE_STATUSES,
+        on_open=lambda: (503, "ERP circuit open; request not sent."),
+        timeout=timeout,
+    )
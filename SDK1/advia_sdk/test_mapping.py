@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from types import MappingProxyType
+
+from SDK1.advia_sdk.config import STATE_DIR
+
+# 🧠 Built-in ADVIA -> ERP test names, used until a mapping file is loaded
+DEFAULT_TEST_NAME_MAPPING = {
+    "RBC": "Measuring weight",
+    "WBC": "White Cell Count",
+    "HGB": "Hemoglobin Level"
+}
+
+# Mapping shipped with the SDK, and the copy last downloaded from the ERP;
+# the downloaded copy wins once it exists
+MAPPING_FILE = Path(__file__).resolve().parent / "test_name_mapping.json"
+REFRESHED_MAPPING_FILE = Path(STATE_DIR) / "test_name_mapping.json"
+# How often (seconds) the mapping file is checked for changes
+CHECK_INTERVAL = 2.0
+
+
+class MappingSnapshot:
+    """
+    One immutable version of the test-name mapping.
+    """
+
+    __slots__ = ('version', 'mapping', 'source')
+
+    def __init__(self, version, mapping, source):
+        self.version = version
+        self.mapping = MappingProxyType(dict(mapping))
+        self.source = source
+
+    def get(self, name):
+        return self.mapping.get(name, name)
+
+    def __repr__(self):
+        return f"MappingSnapshot(version={self.version!r}, entries={len(self.mapping)}, source={self.source!r})"
+
+
+_current = MappingSnapshot("builtin", DEFAULT_TEST_NAME_MAPPING, "builtin")
+_file_stamp = None
+_next_check = 0.0
+_reload_lock = threading.Lock()
+
+
+def _mapping_path():
+    return REFRESHED_MAPPING_FILE if REFRESHED_MAPPING_FILE.exists() else MAPPING_FILE
+
+
+def _load_file(path, stamp):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("mapping file must hold a JSON object")
+    if "mapping" in data:
+        mapping = data["mapping"]
+        version = f"{data.get('version', '?')}@{stamp[0]}"
+    else:
+        mapping = data
+        version = f"{stamp[0]}"
+    if not isinstance(mapping, dict):
+        raise ValueError("mapping must be a JSON object")
+    return MappingSnapshot(version, {str(k): str(v) for k, v in mapping.items()}, str(path))
+
+
+def reload_if_changed(path=None, force=False):
+    """
+    Reload the mapping file if it changed since the last load.
+
+    The new snapshot replaces the current one with a single reference
+    assignment, so readers never need a lock. A broken file keeps the
+    previous mapping in place.
+    """
+    global _current, _file_stamp
+
+    path = Path(path or _mapping_path())
+    if not _reload_lock.acquire(blocking=False):
+        return _current  # Another thread is already reloading
+    try:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return _current
+        stamp = (st.st_mtime_ns, st.st_size, str(path))
+        if not force and stamp == _file_stamp:
+            return _current
+        try:
+            snapshot = _load_file(path, stamp)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not load test name mapping from {path}: {e}")
+            _file_stamp = stamp
+            return _current
+        _current = snapshot
+        _file_stamp = stamp
+        print(f"🔄 Test name mapping loaded: {snapshot}")
+        return snapshot
+    finally:
+        _reload_lock.release()
+
+
+def get_mapping():
+    """
+    Return the current mapping snapshot, checking the file for changes at
+    most once every CHECK_INTERVAL seconds.
+    """
+    global _next_check
+
+    now = time.monotonic()
+    if now >= _next_check:
+        _next_check = now + CHECK_INTERVAL
+        reload_if_changed()
+    return _current
+
+
+def lookup_test_name(name):
+    return get_mapping().get(name)
+
+
+def refresh_from_erp(url, token, path=None):
+    """
+    Download the mapping from the ERP and install it under STATE_DIR.
+
+    The file is replaced atomically; running pipelines pick it up on
+    their next check. The mapping shipped with the SDK is left untouched.
+    """
+    import requests
+
+    path = Path(path or REFRESHED_MAPPING_FILE)
+    response = requests.get(url, headers={'Authorization': f'Bearer {token}'}, timeout=(5, 30))
+    response.raise_for_status()
+    data = response.json()
+    mapping = data.get("mapping", data) if isinstance(data, dict) else None
+    if not isinstance(mapping, dict):
+        raise ValueError("ERP returned an invalid test name mapping")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": data.get("version", "erp"), "mapping": mapping}, f, indent=2)
+    os.replace(tmp_path, path)
+    return reload_if_changed(path, force=True)
@@ -0,0 +1,160 @@
+import os
+import threading
+import time
+
+from Atomwalk_sdk_interface.utils.spool import CHUNK_SIZE, iter_chunks, iter_spool
+from SDK1.advia_sdk.parser import EOT
+
+SPOOL_SUFFIX = ".astm"
+DEFAULT_DEBOUNCE = 1.0        # seconds a file must stay unchanged before it is read
+DEFAULT_POLL_INTERVAL = 2.0   # directory rescan interval (the only trigger without watchdog)
+
+
+def _ends_with_eot(path):
+    """
+    True if the file's last non-whitespace byte is an ASTM EOT, i.e. the
+    analyzer finished the transmission it holds.
+    """
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - 16))
+            return f.read().rstrip().endswith(EOT.encode("ascii"))
+    except OSError:
+        return False
+
+
+class SpoolWatcher:
+    """
+    Watches spool directories and reports .astm files once they are
+    completely written.
+
+    OS notifications (watchdog, when installed) wake the watcher as soon as
+    something changes; a periodic rescan covers missed events and is the
+    only trigger without watchdog. A file is ready once its size and mtime
+    stayed the same for `debounce` seconds, or as soon as two looks agree
+    and it ends with EOT. Each version of a file is reported once.
+    """
+
+    def __init__(self, directories, debounce=DEFAULT_DEBOUNCE, poll_interval=DEFAULT_POLL_INTERVAL):
+        self.directories = [os.path.normpath(d) for d in directories]
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._observer = None
+        self._candidates = {}  # path -> (signature, time the signature was first seen)
+        self._reported = {}    # path -> signature already handed out
+
+    def start(self):
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:  # watchdog is optional; the directories are polled instead
+            print("ℹ️ watchdog not installed; polling spool directories "
+                  f"every {self.poll_interval:.0f}s.")
+            return self
+
+        wake = self._wake
+
+        class WakeHandler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                wake.set()
+
+        observer = Observer()
+        handler = WakeHandler()
+        for directory in self.directories:
+            os.makedirs(directory, exist_ok=True)
+            observer.schedule(handler, directory, recursive=False)
+        observer.start()
+        self._observer = observer
+        return self
+
+    def stop(self):
+        self._wake.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+    def mark_seen(self, path):
+        """
+        Don't report the current version of `path` (e.g. a file the caller
+        just wrote and processes itself).
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        self._reported[os.path.normpath(path)] = (st.st_size, st.st_mtime)
+
+    def forget(self, directory=None):
+        """
+        Report the files (of `directory`) again on the next scan, e.g. to
+        retry files that are still waiting for delivery.
+        """
+        if directory is None:
+            self._reported.clear()
+            return
+        directory = os.path.normpath(directory)
+        for path in [p for p in self._reported if os.path.dirname(p) == directory]:
+            del self._reported[path]
+
+    def scan(self):
+        """
+        Look at the directories once, yielding the paths that became ready
+        while the listing is walked. Files that disappeared are forgotten
+        once the scan has been consumed to the end.
+        """
+        present = set()
+        for directory in self.directories:
+            try:
+                for spool_file in iter_spool(directory, suffix=SPOOL_SUFFIX):
+                    path = os.path.normpath(spool_file.path)
+                    present.add(path)
+                    if self._settled(path, (spool_file.size, spool_file.mtime)):
+                        yield path
+            except OSError:
+                continue
+
+        # Files that were moved away or deleted
+        for stale in [p for p in self._candidates if p not in present]:
+            del self._candidates[stale]
+        for stale in [p for p in self._reported if p not in present]:
+            del self._reported[stale]
+
+    def scan_chunks(self, chunk_size=CHUNK_SIZE):
+        """
+        scan() in lists of at most `chunk_size` paths, so a large backlog
+        is handed out a part at a time.
+        """
+        return iter_chunks(self.scan(), chunk_size)
+
+    def _settled(self, path, signature):
+        if self._reported.get(path) == signature:
+            return False
+        # Taken per file: the caller may work on earlier paths mid-scan
+        now = time.monotonic()
+        previous = self._candidates.get(path)
+        if previous is None or previous[0] != signature:
+            self._candidates[path] = (signature, now)
+            return False
+        if now - previous[1] >= self.debounce or _ends_with_eot(path):
+            del self._candidates[path]
+            self._reported[path] = signature
+            return True
+        return False
+
+    def _next_timeout(self):
+        if self._candidates:
+            # Come back soon to confirm files that are still settling
+            return min(self.poll_interval, max(0.05, self.debounce / 4))
+        return self.poll_interval
+
+    def wait(self):
+        """
+        Block until a notification arrives, a settling file is due for
+        another look or the rescan interval has passed.
+        """
+        self._wake.wait(self._next_timeout())
+        self._wake.clear()
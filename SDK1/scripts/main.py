@@ -1,90 +1,435 @@
 
+import hashlib
+import itertools
 import os
 import shutil
-from SDK1.advia_sdk.parser import parse_astm
-from SDK1.advia_sdk.formatter import format_for_erp
-from SDK1.advia_sdk.sender import send_to_erp
-from SDK1.advia_sdk.pull_from_backup import pull_from_proxy
+import threading
+import time
+from SDK1.advia_sdk.bulk_parser import parse_astm_many
+from SDK1.advia_sdk.parser import parse_astm_iter
+from SDK1.advia_sdk.parse_cache import ParseCache, cache_key, file_sha256, MAX_FILE_BYTES
+from SDK1.advia_sdk.formatter import format_for_erp_iter
+from SDK1.advia_sdk.async_sender import send_many
+from SDK1.advia_sdk.batching import AdaptiveBatchSize, BatchSender
+from SDK1.advia_sdk.outbox import Outbox, PENDING, SENT, DEAD, DELIVERED, ARCHIVED
+from SDK1.advia_sdk.pipeline import FileJob, Stage, run_pipeline
+from SDK1.advia_sdk.priority import PriorityCheck
+from SDK1.advia_sdk.scheduler import FileScheduler
+from SDK1.advia_sdk.replay import Replayer
+from SDK1.advia_sdk.pull_from_backup import pull_from_proxy, pull_file, PROXY_BACKUP
+from SDK1.advia_sdk.watcher import SpoolWatcher
+from SDK1.advia_sdk.test_mapping import refresh_from_erp
 from Atomwalk_sdk_interface.utils.logger import log_test_result
-from SDK1.advia_sdk.config import API_ENDPOINT, get_bearer_token, INCOMING_DIR, PROCESSED_DIR
+from advia_proxy.proxy_listener import generate_secure_filename
+from Atomwalk_sdk_interface.utils.spool import (
+    iter_spool_chunks, CHUNK_SIZE as SPOOL_CHUNK_SIZE, PROGRESS_EVERY as SPOOL_PROGRESS_EVERY
+)
+from SDK1.advia_sdk.config import (
+    get_api_endpoint, get_bearer_token, INCOMING_DIR, PROCESSED_DIR,
+    BULK_PARSE_THRESHOLD, PARSE_WORKERS, TEST_MAPPING_URL,
+    ERP_BATCH_MODE, ERP_BATCH_GROUP_BY, OUTBOX_RETENTION_DAYS,
+    PIPELINE_READERS, PIPELINE_PARSERS, PIPELINE_SENDERS, PIPELINE_QUEUE_SIZE,
+    WATCH_DEBOUNCE, WATCH_POLL_INTERVAL, WATCH_RETRY_INTERVAL
+)
+
+# Shared across files so the batch size keeps adapting during a run
+batch_sizer = AdaptiveBatchSize()
+# One delivery pass at a time in this process: a start_sdk() run (e.g. after
+# a re-login) waits for the watch daemon's current batch and vice versa
+delivery_lock = threading.RLock()
 
 def ensure_directories():
     os.makedirs(INCOMING_DIR, exist_ok=True)
     os.makedirs(PROCESSED_DIR, exist_ok=True)
 
+def archive_path(filename, digest):
+    """
+    Where to archive a delivered file: PROCESSED_DIR under its own name,
+    or, when an earlier file of that name is already there, under the
+    name plus a digest prefix (and a counter if need be). Never an
+    existing file.
+    """
+    target = os.path.join(PROCESSED_DIR, filename)
+    stem, ext = os.path.splitext(filename)
+    for attempt in itertools.count(1):
+        if not os.path.exists(target):
+            return target
+        suffix = digest[:8] if attempt == 1 else f"{digest[:8]}_{attempt}"
+        target = os.path.join(PROCESSED_DIR, f"{stem}_{suffix}{ext}")
+
+def send_pending(filename, digest, device_id, outbox):
+    """
+    Drain the pending outbox rows of a file, several requests in flight at
+    a time, recording each result's delivery state.
+    Returns the number of payloads sent in this pass.
+    """
+    def on_result(index, payload, status_code, response):
+        if status_code == 200:
+            outbox.mark_sent(payload.outbox_id, status_code, response)
+        else:
+            outbox.mark_failed(payload.outbox_id, status_code, response)
+        entry_device_id = payload.entry.get('device_id', device_id)
+        print(f"➡️ Sent to ERP | Status: {status_code} | Response: {response}")
+        log_test_result(device_id=entry_device_id, status=f"ERP Status: {status_code}", test_name=filename, remarks=str(response))
+
+    payloads = outbox.iter_claims(filename, file_digest=digest)
+    api_url = get_api_endpoint()
+    if ERP_BATCH_MODE:
+        sender = BatchSender(api_url, get_bearer_token(), sizer=batch_sizer, group_by=ERP_BATCH_GROUP_BY)
+        succeeded, failed = sender.send(payloads, on_result=on_result)
+    else:
+        succeeded, failed = send_many(payloads, api_url, get_bearer_token(), on_result=on_result)
+    return succeeded + failed
+
+def read_file(job, device_id, cache, outbox):
+    """
+    Spool reader stage: hash the file, then load its cached parse results,
+    or its bytes for the parser. Files already in the outbox or the
+    checkpoint journal skip parsing; a file is known by its name and
+    content, so a new file reusing an old name is not skipped.
+    """
+    print(f"\n🔍 Processing file: {job.filename}")
+    log_test_result(device_id=device_id, status="Processing", test_name=job.filename, remarks="Processing file")
+
+    data = None
+    if os.path.getsize(job.path) <= MAX_FILE_BYTES:
+        with open(job.path, "rb") as f:
+            data = f.read()
+        job.digest = hashlib.sha256(data).hexdigest()
+    else:
+        job.digest = file_sha256(job.path)
+
+    job.milestone = outbox.last_checkpoint(job.filename, job.digest)
+    if job.milestone in (DELIVERED, ARCHIVED) or outbox.has_file(job.filename, job.digest):
+        job.queued = True
+        return job
+    job.key = cache_key(job.path, job.digest)
+    job.results = cache.get(job.key)
+    if job.results is None:
+        job.data = data
+    return job
+
+def parse_file(job, cache, outbox):
+    """
+    Parser stage: parse what the reader loaded and put the file's payloads
+    in the outbox (once).
+    """
+    if job.queued:
+        return job
+
+    if job.data is not None:
+        check = PriorityCheck()
+        job.results = list(parse_astm_iter(job.data, on_record=check))
+        cache.put(job.key, job.results, priority=check.urgent)
+        job.data = None
+
+    if job.results is not None:
+        payloads = (payload for _, payload in format_for_erp_iter(job.results))
+        outbox.enqueue(job.filename, payloads, file_digest=job.digest)
+    else:
+        # Files too big for the cache are streamed straight from disk
+        with open(job.path, "rb") as f:
+            payloads = (payload for _, payload in format_for_erp_iter(parse_astm_iter(f)))
+            outbox.enqueue(job.filename, payloads, file_digest=job.digest)
+
+    job.results = None
+    job.queued = True
+    return job
+
+def send_file(job, device_id, outbox):
+    """
+    Sender stage: send whatever is still pending for the file.
+    """
+    if job.milestone not in (DELIVERED, ARCHIVED):
+        job.sent = send_pending(job.filename, job.digest, device_id, outbox)
+    job.summary = outbox.file_summary(job.filename, job.digest)
+    return job
+
+def archive_file(job, device_id, outbox):
+    """
+    Archiver stage: move fully delivered files to PROCESSED_DIR and log
+    the outcome of every file.
+    """
+    if job.error is not None:
+        print(f"❌ Error processing {job.filename}: {job.error}")
+        log_test_result(device_id=device_id, status="Error", test_name=job.filename, remarks=str(job.error))
+        return job
+
+    if job.milestone == ARCHIVED and not os.path.exists(job.path):
+        # Already moved, e.g. by a run that slotted it in as a STAT file
+        job.ok = True
+        return job
+
+    summary = job.summary
+    total = sum(summary.values())
+    sent_all_payloads = summary.get(SENT, 0) == total
+
+    if sent_all_payloads:
+        if job.milestone not in (DELIVERED, ARCHIVED):
+            outbox.checkpoint(job.filename, DELIVERED, f"{total} results", file_digest=job.digest)
+        target = archive_path(job.filename, job.digest)
+        shutil.move(job.path, target)
+        outbox.checkpoint(job.filename, ARCHIVED, target, file_digest=job.digest)
+        print(f"✅ File moved to processed: {os.path.basename(target)}")
+        log_test_result(device_id=device_id, status="Processed", test_name=job.filename, remarks="File moved to processed.")
+        job.ok = True
+    elif job.sent == 0 and not summary.get(PENDING):
+        # Only dead letters left and nothing was tried: already logged
+        print(f"⏸️ {job.filename}: {summary.get(DEAD, 0)} dead letters waiting for `python -m advia requeue`.")
+    else:
+        print(f"⚠️ Some payloads failed for file: {job.filename} ({summary})")
+        log_test_result(device_id=device_id, status="Partial Failure", test_name=job.filename, remarks=f"Some payloads failed: {summary}")
+        if summary.get(DEAD):
+            log_test_result(device_id=device_id, status="Dead Letters", test_name=job.filename,
+                            remarks=f"{summary[DEAD]} results were rejected by the ERP or expired; "
+                                    "requeue them with `python -m advia requeue`.")
+    return job
+
+def report_scan_progress(scanned):
+    if scanned >= SPOOL_PROGRESS_EVERY:
+        print(f"📂 Scanned {scanned} spool entries...")
+
 def start_sdk():
     """
     Triggered after login: checks for .astm files in incoming directory,
-    processes them, and pushes to ERP.
+    processes them, and pushes to ERP. Runs under delivery_lock, so never
+    alongside a batch of the watch daemon.
 
     Returns:
         True  - if all processed successfully
         False - if some failed
         None  - if nothing to process
     """
+    with delivery_lock:
+        return _start_sdk()
+
+def _start_sdk():
     # Pull files from backup folder first
     pull_from_proxy()
+
+    if TEST_MAPPING_URL:
+        try:
+            refresh_from_erp(TEST_MAPPING_URL, get_bearer_token())
+        except Exception as e:
+            print(f"⚠️ Could not refresh test name mapping from ERP: {e}")
     
     ensure_directories()
-    files = [f for f in os.listdir(INCOMING_DIR) if f.endswith(".astm")]
+    # Huge spool folders are handled a chunk at a time, never listed whole
+    chunks = iter_spool_chunks(INCOMING_DIR, progress=report_scan_progress)
+    first_chunk = next(chunks, None)
 
-    if not files:
+    if first_chunk is None:
         print("ℹ️ No unprocessed .astm files found.")
         log_test_result(device_id="UNKNOWN", status="No Files", test_name="File Scan", remarks="No unprocessed .astm files found.")
         return None
 
+    cache = ParseCache()
+    outbox = Outbox()
+    try:
+        recovered = outbox.recover()
+        outbox.purge_sent(OUTBOX_RETENTION_DAYS)
+        if recovered:
+            print(f"♻️ Re-queued {recovered} results left in flight by the previous run.")
+        unfinished = outbox.unfinished_files()
+        if unfinished:
+            print(f"♻️ Resuming {len(unfinished)} files the previous run did not finish.")
+        all_success = True
+        for chunk in itertools.chain([first_chunk], chunks):
+            all_success = process_files([f.name for f in chunk], cache, outbox) and all_success
+        return all_success
+    finally:
+        outbox.close()
+        cache.close()
+
+def process_files(files, cache, outbox, on_done=None):
+    """
+    Parse, send and archive the given incoming files using the parse cache
+    and the delivery outbox, as a staged pipeline (reader -> parser ->
+    sender -> archiver) with bounded queues between the stages, in the
+    order given by the FileScheduler. `on_done(job)` is called as each
+    file leaves the pipeline.
+    Returns True if every file was fully delivered, False otherwise.
+    """
     device_id = "UNKNOWN"
     try:
-        with open(os.path.join(INCOMING_DIR, files[0]), "r", encoding="utf-8") as f:
-            raw_data = f.read()
-        parsed_entries = parse_astm(raw_data)
-        if parsed_entries and isinstance(parsed_entries, list) and isinstance(parsed_entries[0], dict):
-            device_id = parsed_entries[0].get('device_id', 'UNKNOWN')
+        # Parsed results are cached, so the loop below won't parse this file again
+        first_entry = next(cache.iter_results(os.path.join(INCOMING_DIR, files[0])), None)
+        if first_entry is not None:
+            device_id = first_entry.get('device_id', 'UNKNOWN')
     except Exception as e:
         print(f"⚠️ Could not read device ID from first file: {e}")
 
     print(f"📁 Found {len(files)} .astm files to process.")
     log_test_result(device_id=device_id, status="Files Found", test_name="File Scan", remarks=f"{len(files)} .astm files to process.")
 
-    all_success = True
-
+    # A large backlog of files not parsed before is parsed up front on all cores
+    uncached = []
     for filename in files:
-        file_path = os.path.join(INCOMING_DIR, filename)
-        print(f"\n🔍 Processing file: {filename}")
-        log_test_result(device_id=device_id, status="Processing", test_name=filename, remarks="Processing file")
-
+        path = os.path.join(INCOMING_DIR, filename)
+        if outbox.has_file(filename):
+            continue
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                content = f.read()
-
-            parsed_entries = parse_astm(content)
-            payloads = [format_for_erp(entry) for entry in parsed_entries]
-
-            sent_all_payloads = True
-            for entry, payload in zip(parsed_entries, payloads):
-                entry_device_id = entry.get('device_id', device_id)
-                token = get_bearer_token()
-                status_code, response = send_to_erp(payload, API_ENDPOINT, token)
-                print(f"➡️ Sent to ERP | Status: {status_code} | Response: {response}")
-                log_test_result(device_id=entry_device_id, status=f"ERP Status: {status_code}", test_name=filename, remarks=str(response))
-                if status_code != 200:
-                    sent_all_payloads = False
-
-            if sent_all_payloads:
-                shutil.move(file_path, os.path.join(PROCESSED_DIR, filename))
-                print(f"✅ File moved to processed: {filename}")
-                log_test_result(device_id=device_id, status="Processed", test_name=filename, remarks="File moved to processed.")
-            else:
-                print(f"⚠️ Some payloads failed for file: {filename}")
-                log_test_result(device_id=device_id, status="Partial Failure", test_name=filename, remarks="Some payloads failed.")
-                all_success = False
+            if not cache.contains(cache_key(path)) and os.path.getsize(path) <= MAX_FILE_BYTES:
+                uncached.append(path)
+        except OSError:
+            pass
+    if len(uncached) >= BULK_PARSE_THRESHOLD:
+        print(f"⚙️ Parsing backlog of {len(uncached)} files in parallel...")
+        columns = parse_astm_many(uncached, workers=PARSE_WORKERS)
+        for index, path in enumerate(columns.paths):
+            if path not in columns.errors:
+                cache.put(cache_key(path), list(columns.file_rows(index)), priority=columns.priority[index])
 
-        except Exception as e:
-            print(f"❌ Error processing {filename}: {e}")
-            log_test_result(device_id=device_id, status="Error", test_name=filename, remarks=str(e))
-            all_success = False
+    # Reading, parsing, sending and archiving overlap across files
+    stages = [
+        Stage("reader", lambda job: read_file(job, device_id, cache, outbox), PIPELINE_READERS),
+        Stage("parser", lambda job: parse_file(job, cache, outbox), PIPELINE_PARSERS),
+        Stage("sender", lambda job: send_file(job, device_id, outbox), PIPELINE_SENDERS),
+        Stage("archiver", lambda job: archive_file(job, device_id, outbox), 1, handles_errors=True),
+    ]
+    if on_done is not None:
+        stages.append(Stage("report", lambda job: on_done(job) or job, 1, handles_errors=True))
+    # Oldest first, STAT files ahead, including ones arriving during the run.
+    # The lane of a file comes from its parse cache entry; files not parsed
+    # before go in the routine lane rather than being read here one by one.
+    scheduler = FileScheduler(files, directory=INCOMING_DIR,
+                              classify=lambda path: cache.cached_priority(path))
+    jobs = (FileJob(filename, os.path.join(INCOMING_DIR, filename)) for filename in scheduler)
+    done = run_pipeline(jobs, stages, queue_size=PIPELINE_QUEUE_SIZE)
+    return len(done) == len(files) + scheduler.promoted and all(job.ok for job in done)
+
+def watch_sdk(stop_event=None):
+    """
+    Long-running mode: watches the proxy backup folder and the incoming
+    directory and delivers every .astm file as soon as it is completely
+    written, until `stop_event` is set. Files still waiting for delivery
+    are retried every WATCH_RETRY_INTERVAL seconds.
+    """
+    stop_event = stop_event or threading.Event()
+    ensure_directories()
+    backup_dir = os.path.normpath(PROXY_BACKUP)
+    watcher = SpoolWatcher([PROXY_BACKUP, INCOMING_DIR], debounce=WATCH_DEBOUNCE, poll_interval=WATCH_POLL_INTERVAL)
+    watcher.start()
+    cache = ParseCache()
+    outbox = Outbox()
+    print(f"👀 Watching {PROXY_BACKUP} and {INCOMING_DIR} for new .astm files...")
+    log_test_result(device_id="SDK", status="Watching", test_name="Watch Mode", remarks="Watching spool folders for new files.")
+
+    try:
+        outbox.recover()
+        next_retry = time.monotonic() + WATCH_RETRY_INTERVAL
+        next_purge = 0.0
+        while not stop_event.is_set():
+            # A large backlog is delivered a chunk at a time while it is listed
+            for chunk in watcher.scan_chunks(SPOOL_CHUNK_SIZE):
+                with delivery_lock:
+                    files = {}
+                    for path in chunk:
+                        filename = os.path.basename(path)
+                        if os.path.dirname(path) == backup_dir:
+                            try:
+                                # Processed right away, so the copy needs no second look
+                                watcher.mark_seen(pull_file(filename))
+                            except Exception as e:
+                                print(f"❌ Error pulling {filename} from proxy backup: {e}")
+                                continue
+                        if os.path.exists(os.path.join(INCOMING_DIR, filename)):
+                            files[filename] = None
+
+                    if files:
+                        process_files(list(files), cache, outbox)
+                if stop_event.is_set():
+                    break
+
+            if time.monotonic() >= next_purge:
+                outbox.purge_sent(OUTBOX_RETENTION_DAYS)
+                next_purge = time.monotonic() + 86400
 
-    return all_success
+            if time.monotonic() >= next_retry:
+                # Rows whose claim expired, e.g. of a crashed process, are sent again
+                with delivery_lock:
+                    outbox.recover()
+                watcher.forget(INCOMING_DIR)
+                next_retry = time.monotonic() + WATCH_RETRY_INTERVAL
+            watcher.wait()
+    finally:
+        watcher.stop()
+        outbox.close()
+        cache.close()
+        print("🛑 Watch mode stopped.")
+
+def replay_sdk(messages, offsets, cache, outbox, timeout=300.0):
+    """
+    Load-test mode: feed archived messages back through the SDK, each at
+    its offset (seconds) from the start.
+
+    Every message is written to INCOMING_DIR under a name from the proxy
+    listener's generate_secure_filename() and picked up by a SpoolWatcher with the watch_sdk() debounce and poll
+    settings: whatever has settled is run through the pipeline together.
+    The TCP/serial listeners themselves are not exercised. Returns a
+    ReplayReport.
+    """
+    ensure_directories()
+    watcher = SpoolWatcher([INCOMING_DIR], debounce=WATCH_DEBOUNCE, poll_interval=WATCH_POLL_INTERVAL)
+    stopping = threading.Event()
+    index_of = {}
+
+    def receive(index, message):
+        filename = generate_secure_filename(message.data)
+        index_of[filename] = index
+        with open(os.path.join(INCOMING_DIR, filename), "wb") as f:
+            f.write(message.data)
+
+    def on_done(job):
+        index = index_of.get(job.filename)
+        if index is not None:
+            replayer.complete(index, job.ok, sum(job.summary.values()) if job.summary else 0)
+
+    def deliver():
+        while not stopping.is_set():
+            for chunk in watcher.scan_chunks(SPOOL_CHUNK_SIZE):
+                process_files([os.path.basename(path) for path in chunk], cache, outbox, on_done=on_done)
+            watcher.wait()
+
+    replayer = Replayer(messages, offsets, receive, timeout=timeout)
+    watcher.start()
+    worker = threading.Thread(target=deliver, name="advia-replay", daemon=True)
+    worker.start()
+    try:
+        report = replayer.run()
+    finally:
+        stopping.set()
+        watcher.stop()
+    worker.join(timeout)
+    report.notes.append("messages were written straight into the spool folder; "
+                        "the TCP/serial listeners were not part of the test")
+    if outbox.key_salt:
+        report.notes.append(f"idempotency keys were salted with {outbox.key_salt!r}, "
+                            "so the ERP saw the results as new")
+    return report
+
+def requeue_dead(filename=None):
+    """
+    Give dead outbox rows (of one file, or all) a fresh set of attempts;
+    the next run or watch retry sends them. Returns the rows requeued.
+    """
+    outbox = Outbox()
+    try:
+        files = [filename] if filename else outbox.dead_files()
+        count = outbox.requeue_dead(filename)
+    finally:
+        outbox.close()
+    print(f"♻️ Requeued {count} dead results of {len(files)} files.")
+    log_test_result(device_id="SDK", status="Requeued", test_name="Dead Letters", remarks=f"{count} results requeued.")
+    return count
+
+def start_watch_daemon():
+    """
+    Run watch_sdk() on a background thread. Returns the event that stops it.
+    """
+    stop_event = threading.Event()
+    threading.Thread(target=watch_sdk, args=(stop_event,), name="advia-watch", daemon=True).start()
+    return stop_event
 
 if __name__ == "__main__":
     result = start_sdk()
@@ -0,0 +1,274 @@
+import argparse
+import contextlib
+import os
+import signal
+import tempfile
+import threading
+import time
+
+# Nothing from the SDK is imported at module level: settings are read when
+# SDK1.advia_sdk.config is first imported, which has to happen after
+# --config/--set are applied. PyQt is only imported by the gui command.
+
+SYNTHETIC_FILES = 200
+SYNTHETIC_RESULTS = 20
+
+
+def _apply_settings(args):
+    if args.config:
+        os.environ["ADVIA_CONFIG"] = os.path.abspath(args.config)
+    for item in args.set or ():
+        name, sep, value = item.partition("=")
+        if not sep or not name:
+            raise SystemExit(f"--set expects NAME=VALUE, got {item!r}")
+        os.environ[f"ADVIA_{name.strip().upper()}"] = value
+
+
+def _astm_files(paths):
+    """
+    The .astm files named by `paths`; directories are scanned.
+    """
+    from Atomwalk_sdk_interface.utils.spool import iter_spool
+
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(f.path for f in iter_spool(path)))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            print(f"⚠️ {path} not found, skipped.")
+    return files
+
+
+def synthetic_message(index, results=SYNTHETIC_RESULTS):
+    """
+    An ADVIA-like E1394 message with `results` R records, for benchmarks.
+    """
+    lines = [
+        "H|\\^&|||ADVIA2120i^BENCH|||||||P|1",
+        f"P|1||BENCH_{index:06d}||",
+        f"O|1|{index}||^^^CBC|R",
+    ]
+    for seq in range(results):
+        lines.append(f"R|{seq + 1}|^^^T{seq:02d}|{(index * 31 + seq * 7) % 1000 / 10:.1f}|g/dL||N||F")
+    lines.append("L|1|N")
+    return ("\r".join(lines) + "\r").encode("ascii")
+
+
+def _start_metrics():
+    from SDK1.advia_sdk.config import METRICS_HOST, METRICS_PORT
+
+    if METRICS_PORT:
+        from Atomwalk_sdk_interface.utils.metrics import start_metrics_server
+
+        start_metrics_server(METRICS_PORT, METRICS_HOST)
+
+
+def cmd_run(args):
+    from SDK1.scripts.main import start_sdk
+
+    _start_metrics()
+    result = start_sdk()
+    if result is True:
+        print("🎉 All files processed successfully.")
+    elif result is False:
+        print("⚠️ Some files had issues.")
+        return 1
+    else:
+        print("📭 Nothing to process.")
+    return 0
+
+
+def cmd_watch(args):
+    from SDK1.scripts.main import watch_sdk
+
+    _start_metrics()
+    stop_event = threading.Event()
+
+    def stop(signum, frame):
+        print("🛑 Stopping watch mode...")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    watch_sdk(stop_event)
+    return 0
+
+
+def cmd_replay(args):
+    with contextlib.ExitStack() as stack:
+        return _replay(args, stack)
+
+
+def _replay(args, stack):
+    # Replays run in their own spool folders, outbox, parse cache and log
+    # database, so the live spool and its delivery history are left alone
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="advia-replay-"))
+    os.makedirs(workdir, exist_ok=True)
+    os.environ["ADVIA_INCOMING_DIR"] = os.path.join(workdir, "incoming")
+    os.environ["ADVIA_PROCESSED_DIR"] = os.path.join(workdir, "processed")
+    os.environ["ATOMWALK_LOG_DB"] = os.path.join(workdir, "sdk_logs.db")
+
+    mock = None
+    if args.mock is not None:
+        from mock_erp import FaultProfile, MockErpServer
+
+        mock = stack.enter_context(MockErpServer(FaultProfile(latency=args.mock, require_token=False), port=0))
+        os.environ["ATOMWALK_ERP_URL"] = mock.url
+    elif args.erp:
+        os.environ["ATOMWALK_ERP_URL"] = args.erp
+
+    from Atomwalk_sdk_interface.utils.endpoints import DEFAULT_ERP_BASE_URL
+    from SDK1.advia_sdk.config import get_api_endpoint
+    from SDK1.advia_sdk.outbox import Outbox
+    from SDK1.advia_sdk.parse_cache import ParseCache
+    from SDK1.advia_sdk.replay import (
+        AS_FAST_AS_POSSIBLE, FIXED_RATE, REAL_TIME, load_messages, replay_salt, schedule
+    )
+    from SDK1.scripts.main import replay_sdk
+
+    api_url = get_api_endpoint()
+    if api_url.startswith(DEFAULT_ERP_BASE_URL) and not args.force:
+        print("⛔ Replay would send old results to the production ERP again. "
+              "Point it at the mock (--mock) or a staging ERP (--erp URL), or pass --force.")
+        return 2
+
+    messages = load_messages(args.paths, limit=args.limit)
+    if not messages:
+        print("📭 Nothing to replay.")
+        return 0
+    if args.rate:
+        mode = FIXED_RATE
+    elif args.speed:
+        mode = REAL_TIME
+    else:
+        mode = AS_FAST_AS_POSSIBLE
+    offsets = schedule(messages, mode, rate=args.rate, speed=args.speed, max_gap=args.max_gap)
+
+    _start_metrics()
+    print(f"🔁 Replaying {len(messages)} messages to {api_url} over ~{offsets[-1]:.1f}s (work dir {workdir})")
+    cache = ParseCache(os.path.join(workdir, "parse_cache.db"))
+    stack.callback(cache.close)
+    outbox = Outbox(os.path.join(workdir, "outbox.db"), key_salt=replay_salt())
+    stack.callback(outbox.close)
+    with contextlib.ExitStack() as output:
+        if args.quiet:
+            output.enter_context(contextlib.redirect_stdout(output.enter_context(open(os.devnull, "w"))))
+        report = replay_sdk(messages, offsets, cache, outbox, timeout=args.timeout)
+
+    print(report.format())
+    if mock is not None:
+        stats = mock.stats.snapshot()
+        print(f"   mock ERP  : {sum(stats['requests'].values())} requests, {stats['duplicates']} duplicates")
+    return 0 if report.failed == 0 and report.missing == 0 else 1
+
+
+def cmd_requeue(args):
+    from SDK1.scripts.main import requeue_dead
+
+    requeue_dead(args.file)
+    return 0
+
+
+def cmd_bench(args):
+    from SDK1.advia_sdk.formatter import format_for_erp_iter
+    from SDK1.advia_sdk.parser import parse_astm_iter
+
+    if args.paths:
+        messages = []
+        for path in _astm_files(args.paths):
+            with open(path, "rb") as f:
+                messages.append(f.read())
+    else:
+        messages = [synthetic_message(i) for i in range(args.files)]
+    if not messages:
+        print("📭 Nothing to benchmark.")
+        return 0
+
+    total_bytes = sum(len(m) for m in messages) * args.repeat
+    results = 0
+    parse_time = format_time = 0.0
+    for _ in range(args.repeat):
+        for message in messages:
+            started = time.perf_counter()
+            entries = list(parse_astm_iter(message))
+            parsed = time.perf_counter()
+            for entry, payload in format_for_erp_iter(entries):
+                payload.to_json()
+            format_time += time.perf_counter() - parsed
+            parse_time += parsed - started
+            results += len(entries)
+
+    files = len(messages) * args.repeat
+    elapsed = parse_time + format_time
+    print(f"📊 {files} files, {results} results, {total_bytes / 1e6:.2f} MB")
+    print(f"   parse : {parse_time:.3f}s  ({files / parse_time if parse_time else 0:,.0f} files/s, "
+          f"{total_bytes / 1e6 / parse_time if parse_time else 0:,.1f} MB/s)")
+    print(f"   format: {format_time:.3f}s  ({results / format_time if format_time else 0:,.0f} results/s)")
+    print(f"   total : {elapsed:.3f}s  ({results / elapsed if elapsed else 0:,.0f} results/s)")
+    return 0
+
+
+def cmd_gui(args):
+    from Atomwalk_sdk_interface.main_launcher import SDKInterfaceApp
+
+    SDKInterfaceApp().run()
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m advia", description="Headless ADVIA SDK.")
+    parser.add_argument("--config", metavar="FILE", help="JSON file of settings (same as ADVIA_CONFIG)")
+    parser.add_argument("--set", action="append", metavar="NAME=VALUE",
+                        help="override one setting, e.g. --set INCOMING_DIR=/srv/advia/in")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+
+    run = commands.add_parser("run", help="deliver the files waiting in the spool folders once")
+    run.set_defaults(func=cmd_run)
+
+    watch = commands.add_parser("watch", help="keep delivering files as they arrive (until SIGINT/SIGTERM)")
+    watch.set_defaults(func=cmd_watch)
+
+    replay = commands.add_parser("replay", help="load-test: send archived .astm files through the SDK again")
+    replay.add_argument("paths", nargs="+", help=".astm files or folders of them (e.g. PROCESSED_DIR)")
+    pacing = replay.add_mutually_exclusive_group()
+    pacing.add_argument("--rate", type=float, help="messages per second (default: as fast as possible)")
+    pacing.add_argument("--speed", type=float, help="multiple of the original arrival rate, e.g. 10 = 10x real time")
+    replay.add_argument("--max-gap", type=float, default=None,
+                        help="with --speed, cut idle gaps to this many seconds of original time")
+    replay.add_argument("--limit", type=int, default=None, help="replay at most this many messages")
+    target = replay.add_mutually_exclusive_group()
+    target.add_argument("--erp", metavar="URL", help="base URL of a staging ERP")
+    target.add_argument("--mock", nargs="?", const="0", metavar="LATENCY",
+                        help="send to an in-process mock ERP, optionally with a latency spec such as exp:0.05")
+    replay.add_argument("--force", action="store_true", help="allow replaying to the production ERP")
+    replay.add_argument("--workdir", help="folder for the replay spool, outbox and cache (default: a temp folder)")
+    replay.add_argument("--timeout", type=float, default=300.0,
+                        help="seconds to wait for deliveries after the last message")
+    replay.add_argument("--quiet", action="store_true", help="only print the report")
+    replay.set_defaults(func=cmd_replay)
+
+    requeue = commands.add_parser("requeue", help="retry results the outbox gave up on (dead letters)")
+    requeue.add_argument("file", nargs="?", help="only this spool file name")
+    requeue.set_defaults(func=cmd_requeue)
+
+    bench = commands.add_parser("bench", help="parse and format throughput, no network")
+    bench.add_argument("paths", nargs="*", help=".astm files or folders (default: synthetic messages)")
+    bench.add_argument("--files", type=int, default=SYNTHETIC_FILES, help="synthetic messages to generate")
+    bench.add_argument("--repeat", type=int, default=1, help="passes over the messages")
+    bench.set_defaults(func=cmd_bench)
+
+    gui = commands.add_parser("gui", help="start the desktop application (needs PyQt5)")
+    gui.set_defaults(func=cmd_gui)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 2
+    _apply_settings(args)
+    return args.func(args)
@@ -1,13 +1,15 @@
 import os
 import json
 import datetime
-import serial
 import socket
+import time
 from pathlib import Path
 import uuid
 import hashlib
 import threading
 
+from Atomwalk_sdk_interface.utils.metrics import SIZE_BUCKETS, counter, histogram
+
 # Load config
 base_dir = os.path.dirname(os.path.abspath(__file__))
 config_path = os.path.join(base_dir, "config.json")
@@ -17,8 +19,13 @@ with open(config_path) as f:
 
 backup_dir = Path(config["backup_dir"])
 log_dir = Path(config["log_dir"])
-backup_dir.mkdir(parents=True, exist_ok=True)
-log_dir.mkdir(parents=True, exist_ok=True)
+
+listener_connections = counter("listener_connections_total", "Analyzer connections accepted", ["listener"])
+listener_messages = counter("listener_messages_total", "ASTM messages received and saved", ["listener"])
+listener_bytes = counter("listener_bytes_total", "Bytes received from the analyzer", ["listener"])
+listener_message_bytes = histogram("listener_message_bytes", "Size of received ASTM messages", ["listener"], buckets=SIZE_BUCKETS)
+listener_save_seconds = histogram("listener_save_seconds", "Time spent writing a received message to disk", ["listener"])
+listener_errors = counter("listener_errors_total", "Listener read errors", ["listener"])
 
 def log(msg):
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -29,28 +36,36 @@ def log(msg):
 def generate_secure_filename(data):
     ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]  # milliseconds
     short_uuid = uuid.uuid4().hex[:8]
-    hash_part = hashlib.sha256(data.encode()).hexdigest()[:8]  # Optional: integrity check
+    raw = data.encode() if isinstance(data, str) else data
+    hash_part = hashlib.sha256(raw).hexdigest()[:8]  # Optional: integrity check
     return f"advia_{ts}_{short_uuid}_{hash_part}.astm"
 
-def save_astm_message(data):
+def save_astm_message(data, listener="proxy_tcp"):
+    started = time.perf_counter()
     filename = generate_secure_filename(data)
     filepath = backup_dir / filename
     with open(filepath, "w", encoding="utf-8") as f:
         f.write(data)
     log(f"✅ Saved ASTM file: {filename}")
+    listener_save_seconds.labels(listener).observe(time.perf_counter() - started)
+    listener_messages.labels(listener).inc()
+    listener_message_bytes.labels(listener).observe(len(data))
 
 def read_from_serial():
     log("🔌 Serial Mode: Listening...")
     try:
+        import serial  # pyserial is only needed in serial mode
         ser = serial.Serial(config["serial_port"], config["baudrate"], timeout=5)
         buffer = ""
         while True:
             chunk = ser.read().decode(errors="ignore")
             buffer += chunk
+            listener_bytes.labels("proxy_serial").inc(len(chunk))
             if "\x04" in chunk:  # ASTM EOT (End of Transmission)
-                save_astm_message(buffer)
+                save_astm_message(buffer, "proxy_serial")
                 buffer = ""
     except Exception as e:
+        listener_errors.labels("proxy_serial").inc()
         log(f"❌ Serial Read Error: {e}")
 
 def read_from_tcp():
@@ -60,21 +75,26 @@ def read_from_tcp():
         s.bind((config["tcp_ip"], config["tcp_port"]))
         s.listen(1)
         conn, addr = s.accept()
+        listener_connections.labels("proxy_tcp").inc()
         log(f"🔗 Connected to {addr}")
         buffer = ""
         while True:
             data = conn.recv(1024).decode(errors="ignore")
             if not data:
                 break
+            listener_bytes.labels("proxy_tcp").inc(len(data))
             buffer += data
             if "\x04" in data:  # ASTM EOT
-                save_astm_message(buffer)
+                save_astm_message(buffer, "proxy_tcp")
                 buffer = ""
     except Exception as e:
+        listener_errors.labels("proxy_tcp").inc()
         log(f"❌ TCP Read Error: {e}")
 
 def activate_proxy():
     """Activate the ADVIA proxy listener in backup mode"""
+    backup_dir.mkdir(parents=True, exist_ok=True)
+    log_dir.mkdir(parents=True, exist_ok=True)
     log("🛡️ Proxy Listener manually activated from interface.")
     log("⚠️ SDK unavailable. Awaiting manual or backup data...")
     print("🕐 ADVIA Proxy Listener is now active, waiting for manual file drop.")
@@ -0,0 +1 @@
+from .server import FaultProfile, Latency, MockErpServer
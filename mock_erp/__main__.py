@@ -0,0 +1,44 @@
+import argparse
+
+from mock_erp.server import DEFAULT_HOST, DEFAULT_PORT, FaultProfile, MockErpServer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m mock_erp", description="Local mock of the Atomwalk ERP endpoints.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", default="0",
+                        help='fixed:S, uniform:LO,HI, exp:MEAN or lognormal:MU,SIGMA (seconds)')
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered 500")
+    parser.add_argument("--unauthorized-rate", type=float, default=0.0, help="share of requests answered 401")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of requests answered 429")
+    parser.add_argument("--max-rps", type=int, default=None, help="answer 429 above this many requests per second")
+    parser.add_argument("--slow-body-rate", type=float, default=0.0, help="share of responses sent slowly")
+    parser.add_argument("--no-auth", action="store_true", help="accept requests without an Authorization header")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    profile = FaultProfile(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        unauthorized_rate=args.unauthorized_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        slow_body_rate=args.slow_body_rate,
+        max_rps=args.max_rps,
+        require_token=not args.no_auth,
+        seed=args.seed,
+    )
+    server = MockErpServer(profile, args.host, args.port, verbose=args.verbose)
+    print(f"🧪 Mock ERP listening on {server.url}")
+    print(f"   export ATOMWALK_ERP_URL={server.url}   (stats: GET {server.url}/_mock/stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+SLOW_BODY_CHUNK = 16        # bytes written per step of a slow body
+SLOW_BODY_DELAY = 0.25      # seconds between slow body chunks
+LATENCY_SAMPLES = 100000    # per-endpoint handler latencies kept for /_mock/stats
+
+_ROUTES = (
+    ("login", re.compile(r"^/rest-auth/login/?$")),
+    ("login_info", re.compile(r"^/api/external_login_info/[^/]+/?$")),
+    ("device_token", re.compile(r"^/hr_api/get_device_token/[^/]+/?$")),
+    ("add_claim", re.compile(r"^/hr_api/add_claim/[^/]+/?$")),
+    ("add_test", re.compile(r"^/lab_api/process_glp_test_data/[^/]+/?$")),
+)
+# Called without an Authorization header by the clients
+_PUBLIC_ROUTES = ("login", "device_token")
+
+
+class Latency:
+    """
+    Response delay distribution, parsed from specs such as "0", "fixed:0.05",
+    "uniform:0.01,0.2", "exp:0.05" (mean) or "lognormal:-3,0.8" (mu, sigma).
+    """
+
+    def __init__(self, spec="0"):
+        self.spec = spec
+        kind, _, args = spec.partition(":")
+        if not args:
+            kind, args = "fixed", kind
+        self.kind = kind
+        self.args = [float(a) for a in args.split(",")]
+        if kind not in ("fixed", "uniform", "exp", "lognormal"):
+            raise ValueError(f"unknown latency distribution: {spec}")
+
+    def sample(self, rng):
+        if self.kind == "fixed":
+            return self.args[0]
+        if self.kind == "uniform":
+            return rng.uniform(self.args[0], self.args[1])
+        if self.kind == "exp":
+            return rng.expovariate(1.0 / self.args[0]) if self.args[0] > 0 else 0.0
+        return rng.lognormvariate(self.args[0], self.args[1])
+
+    def __repr__(self):
+        return f"Latency({self.spec!r})"
+
+
+class FaultProfile:
+    """
+    How the mock misbehaves. Rates are probabilities per request.
+
+    error_rate answers 500, unauthorized_rate 401 and rate_limit_rate 429
+    (with Retry-After). max_rps additionally answers 429 once more than
+    that many requests arrive in one second. slow_body_rate sends the
+    response body a few bytes at a time to exercise read timeouts. With
+    require_token, calls without an Authorization header get 401.
+    """
+
+    def __init__(self, latency="0", error_rate=0.0, unauthorized_rate=0.0, rate_limit_rate=0.0,
+                 slow_body_rate=0.0, max_rps=None, retry_after=1, require_token=True, seed=None):
+        self.latency = latency if isinstance(latency, Latency) else Latency(latency)
+        self.error_rate = error_rate
+        self.unauthorized_rate = unauthorized_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.slow_body_rate = slow_body_rate
+        self.max_rps = max_rps
+        self.retry_after = retry_after
+        self.require_token = require_token
+        self.seed = seed
+
+
+class MockStats:
+    """
+    Thread-safe request counters, served as JSON on GET /_mock/stats.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.requests = {}
+            self.statuses = {}
+            self.records = 0
+            self.duplicates = 0
+            self.latencies = {}
+
+    def record(self, route, status, elapsed, records=0, duplicates=0):
+        with self._lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+            key = f"{route}:{status}"
+            self.statuses[key] = self.statuses.get(key, 0) + 1
+            self.records += records
+            self.duplicates += duplicates
+            samples = self.latencies.setdefault(route, [])
+            if len(samples) < LATENCY_SAMPLES:
+                samples.append(elapsed)
+
+    def snapshot(self):
+        with self._lock:
+            latency = {}
+            for route, samples in self.latencies.items():
+                ordered = sorted(samples)
+                latency[route] = {
+                    f"p{p}": ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+                    for p in (50, 90, 99)
+                }
+                latency[route]["max"] = ordered[-1]
+            return {
+                "uptime": time.time() - self.started,
+                "requests": dict(self.requests),
+                "statuses": dict(self.statuses),
+                "records": self.records,
+                "duplicates": self.duplicates,
+                "latency": latency,
+            }
+
+
+class MockErpHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real ERP
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/_mock/stats":
+            self._reply(200, self.server.stats.snapshot())
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        started = time.monotonic()
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        if self.path.rstrip("/") == "/_mock/reset":
+            self.server.stats.reset()
+            self._reply(200, {"status": "reset"})
+            return
+
+        route = next((name for name, pattern in _ROUTES if pattern.match(self.path.split("?")[0])), None)
+        if route is None:
+            self._reply(404, {"error": "not found"})
+            return
+
+        server = self.server
+        profile = server.profile
+        with server.rng_lock:
+            delay = profile.latency.sample(server.rng)
+            roll = server.rng.random()
+            slow = server.rng.random() < profile.slow_body_rate
+        if delay > 0:
+            time.sleep(delay)
+
+        status, payload, records, duplicates = self._fault(route, roll)
+        if status is None:
+            status, payload, records, duplicates = getattr(self, f"_handle_{route}")(body)
+
+        self._reply(status, payload, slow=slow)
+        server.stats.record(route, status, time.monotonic() - started, records, duplicates)
+
+    def _fault(self, route, roll):
+        profile = self.server.profile
+        if route not in _PUBLIC_ROUTES and profile.require_token and not self.headers.get("Authorization"):
+            return 401, {"detail": "Authentication credentials were not provided."}, 0, 0
+        if profile.max_rps and not self.server.admit():
+            return 429, {"detail": "Request was throttled."}, 0, 0
+
+        threshold = profile.error_rate
+        if roll < threshold:
+            return 500, {"error": "Injected server error"}, 0, 0
+        threshold += profile.unauthorized_rate
+        if roll < threshold:
+            return 401, {"detail": "Invalid token."}, 0, 0
+        threshold += profile.rate_limit_rate
+        if roll < threshold:
+            return 429, {"detail": "Request was throttled."}, 0, 0
+        return None, None, 0, 0
+
+    def _json_body(self, body):
+        try:
+            return json.loads(body or b"{}")
+        except ValueError:
+            return None
+
+    def _handle_login(self, body):
+        data = self._json_body(body) or {}
+        if not data.get("username") or not data.get("password"):
+            return 400, {"non_field_errors": ["Unable to log in with provided credentials."]}, 0, 0
+        return 200, {"key": uuid.uuid4().hex}, 0, 0
+
+    def _handle_login_info(self, body):
+        return 200, {"status": "success"}, 0, 0
+
+    def _handle_device_token(self, body):
+        data = self._json_body(body) or {}
+        if not data.get("device_id") or not data.get("secret_key"):
+            return 400, {"error": "Invalid credentials or device not found."}, 0, 0
+        return 200, {"token": uuid.uuid4().hex}, 0, 0
+
+    def _handle_add_claim(self, body):
+        return 200, {"status": "success", "claim_id": uuid.uuid4().hex[:12]}, 1, 0
+
+    def _handle_add_test(self, body):
+        data = self._json_body(body)
+        if not isinstance(data, dict) or "test_data" not in data:
+            return 400, {"error": "test_data is required"}, 0, 0
+
+        test_data = data["test_data"]
+        records = test_data if isinstance(test_data, list) else [test_data]
+        header_key = self.headers.get("Idempotency-Key")
+        results = []
+        duplicates = 0
+        for record in records:
+            key = record.get("idempotency_key") if isinstance(record, dict) else None
+            if key is None and len(records) == 1:
+                key = header_key
+            duplicate = key is not None and not self.server.remember_key(key)
+            duplicates += duplicate
+            results.append({"status": 200, "duplicate": duplicate})
+
+        if isinstance(test_data, list):
+            return 200, {"status": "success", "results": results}, len(records), duplicates
+        return 200, {"status": "success", "duplicate": results[0]["duplicate"]}, 1, duplicates
+
+    def _reply(self, status, payload, slow=False):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 429:
+            self.send_header("Retry-After", str(self.server.profile.retry_after))
+        self.end_headers()
+        if not slow:
+            self.wfile.write(body)
+            return
+        try:
+            for start in range(0, len(body), SLOW_BODY_CHUNK):
+                self.wfile.write(body[start:start + SLOW_BODY_CHUNK])
+                self.wfile.flush()
+                time.sleep(SLOW_BODY_DELAY)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # Client gave up (read timeout)
+
+
+class MockErpServer(ThreadingHTTPServer):
+    """
+    In-process stand-in for the Atomwalk ERP endpoints the SDKs call.
+
+    Use as a context manager to run it on a background thread:
+
+        with MockErpServer(FaultProfile(latency="exp:0.05", error_rate=0.02)) as erp:
+            os.environ["ATOMWALK_ERP_URL"] = erp.url
+            ...
+            print(erp.stats.snapshot())
+    """
+
+    daemon_threads = True
+
+    def __init__(self, profile=None, host=DEFAULT_HOST, port=DEFAULT_PORT, verbose=False):
+        super().__init__((host, port), MockErpHandler)
+        self.profile = profile or FaultProfile()
+        self.verbose = verbose
+        self.stats = MockStats()
+        self.rng = random.Random(self.profile.seed)
+        self.rng_lock = threading.Lock()
+        self._keys = set()
+        self._keys_lock = threading.Lock()
+        self._window = (0, 0)  # (second, requests admitted in it)
+        self._window_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def remember_key(self, key):
+        """
+        Record an idempotency key; False if it was seen before.
+        """
+        with self._keys_lock:
+            if key in self._keys:
+                return False
+            self._keys.add(key)
+            return True
+
+    def admit(self):
+        now = int(time.monotonic())
+        with self._window_lock:
+            second, count = self._window
+            if second != now:
+                second, count = now, 0
+            count += 1
+            self._window = (second, count)
+            return count <= self.profile.max_rps
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-erp", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,29 @@
+import json
+
+from SDK1.advia_sdk.formatter import ErpBatch, ErpPayload
+from SDK1.advia_sdk.models import AstmResult
+
+NAMES = {"WBC": "White Blood Cells"}
+
+
+def make_payload(idempotency_key=None, rat_no="RAT1"):
+    return ErpPayload(AstmResult(rat_no, "WBC", "7.1", "ADVIA"), "09:30 AM", "18-10-2026", NAMES,
+                      idempotency_key=idempotency_key)
+
+
+def test_json_matches_dict():
+    for key in (None, "ab-1"):
+        payload = make_payload(key)
+        decoded = json.loads(payload.to_json())
+        assert decoded == payload.to_dict()
+        assert list(decoded["test_data"]) == list(payload.to_dict()["test_data"])
+
+
+def test_json_escapes_values():
+    payload = make_payload(rat_no='R"1 %s')
+    assert json.loads(payload.to_json()) == payload.to_dict()
+
+
+def test_batch_json_matches_dict():
+    batch = ErpBatch([make_payload("ab-1"), make_payload("ab-2")])
+    assert json.loads(batch.to_json()) == batch.to_dict()
@@ -0,0 +1,78 @@
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from Atomwalk_sdk_interface.utils.retry import CircuitBreaker, RetryPolicy
+from IOT_SDK import sender
+
+CLAIM = {"form_data": {"remarks": "Sensor Reading", "call_mode": "CLAIM_SAVE"}}
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.text = '{"status": "success"}'
+        self.request = requests.Request("POST", "http://erp.invalid/", data={"a": "1"}).prepare()
+
+    def json(self):
+        return {"status": "success"}
+
+
+def connect_error():
+    reason = NewConnectionError(None, "Connection refused")
+    return requests.ConnectionError(MaxRetryError(None, "/hr_api/add_claim/", reason))
+
+
+@pytest.fixture
+def post(monkeypatch):
+    """
+    Replaces requests.post with one that plays back `outcomes` (exceptions
+    to raise or status codes to answer) and records every call.
+    """
+    calls = []
+
+    def install(*outcomes):
+        outcomes = list(outcomes)
+
+        def fake_post(url, **kwargs):
+            calls.append(kwargs)
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return FakeResponse(outcome)
+
+        monkeypatch.setattr(sender.requests, "post", fake_post)
+        return calls
+
+    monkeypatch.setattr(sender, "retry_policy", RetryPolicy(max_attempts=4, base_delay=0, max_delay=0))
+    monkeypatch.setattr(sender, "claim_breaker", CircuitBreaker("test", failure_threshold=100))
+    return install
+
+
+def test_connect_errors_are_retried(post):
+    calls = post(connect_error(), connect_error(), 200)
+    assert sender.send_to_erp(CLAIM) == {"status": "success"}
+    assert len(calls) == 3
+
+
+def test_refusals_are_retried(post):
+    calls = post(429, 503, 200)
+    assert sender.send_to_erp(CLAIM) == {"status": "success"}
+    assert len(calls) == 3
+
+
+@pytest.mark.parametrize("outcome", [requests.ReadTimeout("read timed out"),
+                                     requests.ConnectionError("Connection aborted."), 500, 502, 504])
+def test_claims_the_server_may_have_saved_are_not_resent(post, outcome):
+    calls = post(outcome, 200)
+    assert sender.send_to_erp(CLAIM) is None
+    assert len(calls) == 1
+
+
+def test_attempt_timeouts_stay_within_the_deadline(post, monkeypatch):
+    monkeypatch.setattr(sender, "retry_policy", RetryPolicy(max_attempts=4, base_delay=0, max_delay=0, deadline=2.0))
+    calls = post(connect_error(), 200)
+    assert sender.send_to_erp(CLAIM) == {"status": "success"}
+    first, second = (call["timeout"] for call in calls)
+    assert all(0 < t <= 2.0 for t in first + second)
+    assert second[1] <= first[1]
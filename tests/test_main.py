@@ -0,0 +1,72 @@
+import pytest
+
+from mock_erp import FaultProfile, MockErpServer
+from SDK1.advia_sdk import sender
+from SDK1.advia_sdk.outbox import Outbox
+from SDK1.advia_sdk.parse_cache import ParseCache
+from SDK1.advia_sdk.replay import ReplayMessage, replay_salt
+from SDK1.scripts import main
+
+
+def message(rbc):
+    return (f"H|\\^&|||ADVIA2120i|||||||P|1\rP|1||RAT1||\rO|1|1||^^^CBC|R\r"
+            f"R|1|^^^RBC|{rbc}|g/dL||N||F\rL|1|N\r\x04").encode("ascii")
+
+
+@pytest.fixture
+def sdk(tmp_path, monkeypatch):
+    incoming, processed = tmp_path / "incoming", tmp_path / "processed"
+    incoming.mkdir()
+    processed.mkdir()
+    monkeypatch.setattr(main, "INCOMING_DIR", str(incoming))
+    monkeypatch.setattr(main, "PROCESSED_DIR", str(processed))
+    monkeypatch.setattr(main, "log_test_result", lambda **kwargs: None)
+    # Each test talks to a fresh mock ERP, which has confirmed nothing yet
+    monkeypatch.setattr(sender, "confirmed_keys", sender.ConfirmedKeys())
+    with MockErpServer(FaultProfile(require_token=False), port=0) as mock:
+        monkeypatch.setattr(main, "get_api_endpoint", lambda: f"{mock.url}/lab_api/process_glp_test_data/TEST/")
+        cache = ParseCache(tmp_path / "parse_cache.db")
+        outbox = Outbox(tmp_path / "outbox.db")
+        yield incoming, processed, mock, cache, outbox
+        outbox.close()
+        cache.close()
+
+
+def test_redropped_name_with_new_content_is_sent(sdk):
+    incoming, processed, mock, cache, outbox = sdk
+    for rbc in ("1.0", "2.0"):
+        (incoming / "sample.astm").write_bytes(message(rbc))
+        assert main.process_files(["sample.astm"], cache, outbox)
+
+    stats = mock.stats.snapshot()
+    assert stats["records"] - stats["duplicates"] == 2
+    archived = sorted(path.read_bytes() for path in processed.iterdir())
+    assert archived == [message("1.0"), message("2.0")]
+
+
+def test_redropped_identical_file_is_not_sent_again(sdk):
+    incoming, processed, mock, cache, outbox = sdk
+    for _ in range(2):
+        (incoming / "sample.astm").write_bytes(message("1.0"))
+        assert main.process_files(["sample.astm"], cache, outbox)
+
+    assert mock.stats.snapshot()["records"] == 1
+    assert len(list(processed.iterdir())) == 2
+
+
+def test_replays_are_not_dropped_as_duplicates(sdk, tmp_path, monkeypatch):
+    incoming, processed, mock, cache, outbox = sdk
+    monkeypatch.setattr(main, "WATCH_DEBOUNCE", 0.05)
+    monkeypatch.setattr(main, "WATCH_POLL_INTERVAL", 0.1)
+    messages = [ReplayMessage("sample.astm", message("1.0"), 0.0)]
+    for run in range(2):
+        replay_outbox = Outbox(tmp_path / f"replay{run}.db", key_salt=replay_salt())
+        try:
+            report = main.replay_sdk(messages, [0.0], cache, replay_outbox, timeout=10)
+        finally:
+            replay_outbox.close()
+        assert report.delivered == 1
+
+    stats = mock.stats.snapshot()
+    assert stats["records"] == 2 and stats["duplicates"] == 0
+    assert all(path.name.startswith("advia_") for path in processed.iterdir())
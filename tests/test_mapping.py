@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from SDK1.advia_sdk import test_mapping
+
+
+@pytest.fixture
+def mapping_files(tmp_path, monkeypatch):
+    shipped = tmp_path / "shipped.json"
+    shipped.write_text(json.dumps({"version": "shipped", "mapping": {"RBC": "Red Cells"}}))
+    refreshed = tmp_path / "state" / "test_name_mapping.json"
+    monkeypatch.setattr(test_mapping, "MAPPING_FILE", shipped)
+    monkeypatch.setattr(test_mapping, "REFRESHED_MAPPING_FILE", refreshed)
+    monkeypatch.setattr(test_mapping, "_current", test_mapping._current)
+    monkeypatch.setattr(test_mapping, "_file_stamp", None)
+    return shipped, refreshed
+
+
+def test_shipped_file_is_used_until_a_refresh_exists(mapping_files):
+    shipped, refreshed = mapping_files
+    assert test_mapping.reload_if_changed().get("RBC") == "Red Cells"
+
+    refreshed.parent.mkdir()
+    refreshed.write_text(json.dumps({"version": "erp", "mapping": {"RBC": "Erythrocytes"}}))
+    assert test_mapping.reload_if_changed().get("RBC") == "Erythrocytes"
+    assert json.loads(shipped.read_text())["mapping"] == {"RBC": "Red Cells"}
+
+
+@pytest.mark.parametrize("content", ["42", "null", '["RBC"]', '"RBC"'])
+def test_file_without_an_object_keeps_the_previous_mapping(mapping_files, content):
+    shipped, _ = mapping_files
+    before = test_mapping.reload_if_changed()
+    shipped.write_text(content + " " * 8)
+    assert test_mapping.reload_if_changed() is before
+
+
+def test_refresh_writes_under_state_dir(mapping_files, monkeypatch):
+    import requests
+
+    shipped, refreshed = mapping_files
+    shipped_before = shipped.read_bytes()
+
+    class Response:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"version": "7", "mapping": {"RBC": "Erythrocytes"}}
+
+    monkeypatch.setattr(requests, "get", lambda url, **kwargs: Response())
+    snapshot = test_mapping.refresh_from_erp("http://erp.invalid/mapping", "token")
+    assert snapshot.get("RBC") == "Erythrocytes"
+    assert snapshot.source == str(refreshed)
+    assert shipped.read_bytes() == shipped_before
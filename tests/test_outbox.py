@@ -0,0 +1,128 @@
+import sqlite3
+import threading
+import time
+
+from SDK1.advia_sdk.formatter import format_for_erp_iter
+from SDK1.advia_sdk.models import AstmResult
+from SDK1.advia_sdk.outbox import DEAD, IN_FLIGHT, PENDING, SENT, Outbox
+
+
+def make_outbox(tmp_path, **kwargs):
+    outbox = Outbox(tmp_path / "outbox.db", **kwargs)
+    payloads = [payload for _, payload in format_for_erp_iter([AstmResult("RAT1", "WBC", "7.1", "ADVIA")])]
+    outbox.enqueue("a.astm", payloads, file_digest="ab" * 32)
+    return outbox
+
+
+def fail_once(outbox, status_code):
+    for payload in outbox.iter_claims("a.astm"):
+        outbox.mark_failed(payload.outbox_id, status_code, "failed")
+
+
+def test_outage_does_not_use_up_attempts(tmp_path):
+    outbox = make_outbox(tmp_path, max_attempts=3)
+    for status_code in [503] * 20 + [500, 429, 504]:
+        fail_once(outbox, status_code)
+    assert outbox.file_summary("a.astm") == {PENDING: 1}
+
+
+def test_rejections_go_dead_and_can_be_requeued(tmp_path):
+    outbox = make_outbox(tmp_path, max_attempts=3)
+    for _ in range(3):
+        fail_once(outbox, 400)
+    assert outbox.file_summary("a.astm") == {DEAD: 1}
+    assert outbox.dead_files() == ["a.astm"]
+
+    assert outbox.requeue_dead("a.astm") == 1
+    assert outbox.file_summary("a.astm") == {PENDING: 1}
+    fail_once(outbox, 400)
+    assert outbox.file_summary("a.astm") == {PENDING: 1}
+
+
+def test_transient_failures_expire(tmp_path):
+    outbox = make_outbox(tmp_path, max_age_days=0)
+    time.sleep(0.01)
+    fail_once(outbox, 503)
+    assert outbox.file_summary("a.astm") == {DEAD: 1}
+
+
+def test_purge_sent(tmp_path):
+    outbox = make_outbox(tmp_path)
+    for payload in outbox.iter_claims("a.astm"):
+        outbox.mark_sent(payload.outbox_id, 200)
+    assert outbox.purge_sent(older_than_days=1) == 0
+    assert outbox.file_summary("a.astm") == {SENT: 1}
+    assert outbox.purge_sent(older_than_days=-1) == 1
+    assert outbox.file_summary("a.astm") == {}
+
+
+def test_same_name_new_content_is_a_new_file(tmp_path):
+    outbox = make_outbox(tmp_path)
+    payloads = [payload for _, payload in format_for_erp_iter([AstmResult("RAT1", "WBC", "8.2", "ADVIA")])]
+    outbox.enqueue("a.astm", payloads, file_digest="cd" * 32)
+    assert outbox.has_file("a.astm", "ab" * 32) and outbox.has_file("a.astm", "cd" * 32)
+    assert not outbox.has_file("a.astm", "ef" * 32)
+
+    claimed = list(outbox.iter_claims("a.astm", file_digest="cd" * 32))
+    assert [payload.entry["test_value"] for payload in claimed] == ["8.2"]
+    assert outbox.file_summary("a.astm", "ab" * 32) == {PENDING: 1}
+
+
+def test_outbox_of_an_older_version_is_rebuilt(tmp_path):
+    conn = sqlite3.connect(tmp_path / "outbox.db")
+    conn.execute("""
+        CREATE TABLE outbox (id INTEGER PRIMARY KEY AUTOINCREMENT, file_name TEXT NOT NULL, seq INTEGER NOT NULL,
+            rat_no TEXT, test_name TEXT, test_value TEXT, device_id TEXT, test_time TEXT, test_date TEXT,
+            state TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0, last_status INTEGER,
+            last_response TEXT, created_at REAL, updated_at REAL, UNIQUE (file_name, seq))
+    """)
+    conn.execute("CREATE TABLE checkpoints (id INTEGER PRIMARY KEY AUTOINCREMENT, file_name TEXT NOT NULL, "
+                 "milestone TEXT NOT NULL, detail TEXT, created_at REAL)")
+    conn.execute("INSERT INTO outbox (file_name, seq, rat_no, test_name, test_value) VALUES ('a.astm', 0, 'RAT1', 'WBC', '7.1')")
+    conn.execute("INSERT INTO checkpoints (file_name, milestone, detail) VALUES ('a.astm', 'queued', ?)", ("ab" * 32,))
+    conn.commit()
+    conn.close()
+
+    outbox = Outbox(tmp_path / "outbox.db")
+    assert outbox.file_summary("a.astm", "ab" * 32) == {PENDING: 1}
+
+
+def test_two_connections_never_claim_a_row_twice(tmp_path):
+    first = make_outbox(tmp_path)
+    payloads = [payload for _, payload in format_for_erp_iter(
+        [AstmResult(f"RAT{i}", "WBC", "7.1", "ADVIA") for i in range(400)])]
+    first.enqueue("b.astm", payloads, file_digest="cd" * 32)
+    second = Outbox(tmp_path / "outbox.db")
+    claimed = [[], []]
+
+    def drain(outbox, into):
+        while True:
+            chunk = outbox.claim("b.astm", limit=7)
+            if not chunk:
+                return
+            into.extend(payload.outbox_id for payload in chunk)
+
+    threads = [threading.Thread(target=drain, args=(outbox, into)) for outbox, into in zip((first, second), claimed)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(claimed[0]) + len(claimed[1]) == len(set(claimed[0]) | set(claimed[1])) == 400
+
+
+def test_recover_only_takes_expired_claims(tmp_path):
+    outbox = make_outbox(tmp_path)
+    assert len(outbox.claim("a.astm")) == 1
+    assert outbox.recover() == 0
+    assert outbox.file_summary("a.astm") == {IN_FLIGHT: 1}
+    assert outbox.recover(lease=-1) == 1
+    assert outbox.file_summary("a.astm") == {PENDING: 1}
+
+
+def test_salted_outbox_gives_results_new_keys(tmp_path):
+    plain = make_outbox(tmp_path / "plain")
+    salted = make_outbox(tmp_path / "salted", key_salt="replay-1")
+    plain_key, = (payload.idempotency_key for payload in plain.iter_claims("a.astm"))
+    salted_key, = (payload.idempotency_key for payload in salted.iter_claims("a.astm"))
+    assert salted_key != plain_key
+    assert salted_key.startswith(plain_key)
@@ -0,0 +1,87 @@
+from SDK1.advia_sdk.models import AstmResult
+from SDK1.advia_sdk.parser import E1381Decoder, parse_astm
+
+STX, ETX, EOT, ENQ, ETB = b"\x02", b"\x03", b"\x04", b"\x05", b"\x17"
+
+
+def frame(fn, text, last=False, corrupt=False):
+    body = str(fn).encode("ascii") + text
+    terminator = ETX if last else ETB
+    checksum = (sum(body) + terminator[0]) & 0xFF
+    if corrupt:
+        checksum ^= 0xFF
+    return STX + body + terminator + b"%02X" % checksum + b"\r\n"
+
+
+# One message split mid-record over three frames: WBC=7.1 and RBC=5.5
+TEXTS = [
+    b"H|\\^&|||ADVIA\rP|1||RAT1\rR|1|^^^WBC|7.",
+    b"1\rR|2|^^^RBC|5.",
+    b"5\rL|1\r",
+]
+
+
+def message(*frames):
+    return ENQ + b"".join(frames) + EOT
+
+
+def test_multi_frame_message():
+    data = message(frame(1, TEXTS[0]), frame(2, TEXTS[1]), frame(3, TEXTS[2], last=True))
+    assert parse_astm(data) == [
+        AstmResult("RAT1", "WBC", "7.1", "ADVIA"),
+        AstmResult("RAT1", "RBC", "5.5", "ADVIA"),
+    ]
+
+
+def test_bad_frame_not_retransmitted_drops_partial_records():
+    data = message(frame(1, TEXTS[0]), frame(2, TEXTS[1], corrupt=True), frame(3, TEXTS[2], last=True))
+    # Both results straddle the lost frame; neither may be glued together
+    assert parse_astm(data) == []
+
+
+def test_bad_frame_retransmitted_is_recovered():
+    data = message(frame(1, TEXTS[0]), frame(2, TEXTS[1], corrupt=True), frame(2, TEXTS[1]),
+                   frame(3, TEXTS[2], last=True))
+    assert [r.test_value for r in parse_astm(data)] == ["7.1", "5.5"]
+
+
+def test_frame_number_gap_drops_partial_record():
+    data = message(frame(1, TEXTS[0]), frame(3, TEXTS[2], last=True))
+    assert parse_astm(data) == []
+
+
+def test_gap_resyncs_at_next_record():
+    data = message(frame(1, b"H|\\^&|||ADVIA\rP|1||RAT1\rR|1|^^^WBC|7."),
+                   frame(3, b"9\rR|3|^^^HGB|13.2\rL|1\r", last=True))
+    assert parse_astm(data) == [AstmResult("RAT1", "HGB", "13.2", "ADVIA")]
+
+
+def test_frame_cut_off_by_new_stx():
+    cut = frame(2, TEXTS[1])[:6]
+    data = message(frame(1, TEXTS[0]), cut, frame(3, TEXTS[2], last=True))
+    assert parse_astm(data) == []
+
+    data = message(frame(1, TEXTS[0]), cut, frame(2, TEXTS[1]), frame(3, TEXTS[2], last=True))
+    assert [r.test_value for r in parse_astm(data)] == ["7.1", "5.5"]
+
+
+def test_bad_last_frame_before_eot_is_not_flushed():
+    data = message(frame(1, TEXTS[0]), frame(2, b"1\rR|2|^^^RBC|5.5", last=True, corrupt=True))
+    assert parse_astm(data) == []
+
+
+def test_next_message_after_bad_frame_is_clean():
+    bad = message(frame(1, TEXTS[0]), frame(2, TEXTS[1], corrupt=True))
+    good = message(frame(1, b"H|\\^&|||ADVIA\rP|1||RAT2\rR|1|^^^PLT|250\rL|1\r", last=True))
+    assert parse_astm(bad + good) == [AstmResult("RAT2", "PLT", "250", "ADVIA")]
+
+
+def test_byte_by_byte_feed_matches_whole_feed():
+    data = message(frame(1, TEXTS[0]), frame(2, TEXTS[1], corrupt=True), frame(2, TEXTS[1]),
+                   frame(3, TEXTS[2], last=True))
+    decoder = E1381Decoder()
+    records = [r for i in range(len(data)) for r in decoder.feed(data[i:i + 1])]
+    records += list(decoder.close())
+    assert records[-1] == b"L|1"
+    assert b"R|1|^^^WBC|7.1" in records
+    assert decoder.bad_frames == 1
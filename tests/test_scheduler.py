@@ -0,0 +1,22 @@
+import os
+import time
+
+from SDK1.advia_sdk.scheduler import FileScheduler
+
+
+def test_rescan_only_reads_new_arrivals(tmp_path):
+    hour_ago = time.time() - 3600
+    for i in range(50):
+        path = tmp_path / f"old{i:02d}.astm"
+        path.write_bytes(b"H|\\^&\r")
+        os.utime(path, (hour_ago, hour_ago))
+    read = []
+    scheduler = FileScheduler(["old00.astm"], directory=str(tmp_path), rescan_interval=0, min_age=0,
+                              classify=lambda path: None,
+                              classify_new=lambda path: read.append(os.path.basename(path)) or "stat" in path)
+    (tmp_path / "new_stat.astm").write_bytes(b"H|\\^&\r")
+    (tmp_path / "new.astm").write_bytes(b"H|\\^&\r")
+
+    assert list(scheduler) == ["new_stat.astm", "old00.astm"]
+    assert sorted(read) == ["new.astm", "new_stat.astm"]
+    assert scheduler.promoted == 1